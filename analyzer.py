@@ -1,5 +1,273 @@
 import pandas as pd
 import numpy as np
+from dataclasses import dataclass
+from numba_compat import njit, NUMBA_AVAILABLE
+
+
+@dataclass
+class _PreparedArrays:
+    """NumPy arrays of the derived backtest columns, computed once per DataFrame"""
+    returns: np.ndarray
+    pnl: np.ndarray
+    equity: np.ndarray
+    running_max: np.ndarray
+    drawdown: np.ndarray
+
+
+@dataclass
+class _PnlMoments:
+    """Mean and standard deviations of the per-bar PnL, shared by the return/risk ratios"""
+    mean: float
+    std: float
+    downside_std: float
+    downside_count: int
+
+
+def _drop_nan(values):
+    """Drop NaN values, returning a view when the only NaN is the leading bar"""
+    missing = np.isnan(values)
+    if not missing.any():
+        return values
+    if missing[0] and not missing[1:].any():
+        # Usual case: the first PnL bar has no previous position
+        return values[1:]
+    return values[~missing]
+
+
+def _pnl_moments(pnl):
+    """Compute PnL mean, std and downside std once (NaN bars skipped, ddof=1 like pandas)"""
+    pnl = _drop_nan(np.asarray(pnl, dtype=np.float64))
+    if pnl.size == 0:
+        return _PnlMoments(np.nan, np.nan, np.nan, 0)
+    
+    mean = pnl.mean()
+    std = pnl.std(ddof=1) if pnl.size > 1 else np.nan
+    
+    downside = pnl[pnl < 0]
+    if downside.size > 1:
+        downside_std = downside.std(ddof=1)
+    else:
+        downside_std = np.nan
+    return _PnlMoments(float(mean), float(std), float(downside_std), int(downside.size))
+
+
+def _pnl_moments_columns(pnl):
+    """_pnl_moments for every column of a (bars x strategies) PnL block, reduced blockwise"""
+    pnl = np.asarray(pnl, dtype=np.float64)
+    valid = ~np.isnan(pnl)
+    losing = pnl < 0
+    count = valid.sum(axis=0)
+    downside_count = losing.sum(axis=0)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(valid, pnl, 0.0).sum(axis=0) / count
+        dev = np.where(valid, pnl - mean, 0.0)
+        std = np.sqrt(np.einsum('ij,ij->j', dev, dev) / (count - 1))
+        
+        downside_mean = np.where(losing, pnl, 0.0).sum(axis=0) / downside_count
+        downside_dev = np.where(losing, pnl - downside_mean, 0.0)
+        downside_std = np.sqrt(np.einsum('ij,ij->j', downside_dev, downside_dev) / (downside_count - 1))
+    
+    # Same conventions as _pnl_moments: no std from fewer than two values
+    std[count < 2] = np.nan
+    downside_std[downside_count < 2] = np.nan
+    return [
+        _PnlMoments(float(m), float(s), float(d), int(c))
+        for m, s, d, c in zip(mean, std, downside_std, downside_count)
+    ]
+
+
+def _simple_returns(close):
+    """Bar-to-bar percentage returns with a zero first bar (like pct_change().fillna(0))"""
+    returns = np.zeros(len(close), dtype=close.dtype)
+    if len(close) > 1:
+        np.divide(close[1:] - close[:-1], close[:-1], out=returns[1:])
+        returns[np.isnan(returns)] = 0.0
+    return returns
+
+
+def _position_pnl(position, returns):
+    """PnL earned by holding the previous bar's position over this bar's return"""
+    pnl = np.empty(len(returns), dtype=returns.dtype)
+    pnl[:1] = np.nan
+    np.multiply(position[:-1], returns[1:], out=pnl[1:])
+    return pnl
+
+
+@njit(cache=True)
+def _equity_drawdown_kernel(pnl, equity, running_max, drawdown):
+    """Fused cumprod/cummax/drawdown scan over one PnL column, NaN bars skipped"""
+    current = 1.0
+    peak = 0.0
+    started = False
+    
+    for i in range(pnl.shape[0]):
+        if np.isnan(pnl[i]):
+            equity[i] = np.nan
+            running_max[i] = np.nan
+            drawdown[i] = np.nan
+            continue
+        
+        current *= 1.0 + pnl[i]
+        if not started or current > peak:
+            peak = current
+            started = True
+        
+        equity[i] = current
+        running_max[i] = peak
+        drawdown[i] = (current - peak) / peak
+
+
+def _equity_and_drawdown(pnl):
+    """Compound PnL into equity, running max and drawdown (NaN bars skipped like pandas)"""
+    if NUMBA_AVAILABLE:
+        equity = np.empty_like(pnl)
+        running_max = np.empty_like(pnl)
+        drawdown = np.empty_like(pnl)
+        if pnl.ndim == 1:
+            _equity_drawdown_kernel(pnl, equity, running_max, drawdown)
+        else:
+            for i in range(pnl.shape[1]):
+                _equity_drawdown_kernel(pnl[:, i], equity[:, i], running_max[:, i], drawdown[:, i])
+        return equity, running_max, drawdown
+    
+    # A 2-D pnl (bars x strategies) is compounded down each column
+    growth = 1.0 + pnl
+    missing = np.isnan(growth)
+    growth[missing] = 1.0
+    
+    equity = np.cumprod(growth, axis=0, out=growth)
+    equity[missing] = np.nan
+    
+    running_max = np.fmax.accumulate(equity)
+    running_max[missing] = np.nan
+    drawdown = (equity - running_max) / running_max
+    return equity, running_max, drawdown
+
+
+@njit(cache=True)
+def _trade_stats_kernel(position, pnl):
+    """Single pass over positions returning closed-trade PnLs and all trade durations"""
+    n = position.shape[0]
+    trade_pnls = np.empty(n)
+    trade_durations = np.empty(n)
+    n_pnls = 0
+    n_durations = 0
+    current_pnl = 0.0
+    current_duration = 0
+    in_trade = False
+    
+    for i in range(n):
+        if position[i] != 0:
+            if in_trade:
+                current_pnl += pnl[i]
+                current_duration += 1
+            else:
+                # Entering a trade (the entry bar's PnL belongs to the previous position)
+                in_trade = True
+                current_pnl = 0.0
+                current_duration = 1
+        elif in_trade:
+            # Exiting a trade
+            current_pnl += pnl[i]
+            trade_pnls[n_pnls] = current_pnl
+            trade_durations[n_durations] = current_duration
+            n_pnls += 1
+            n_durations += 1
+            in_trade = False
+    
+    # A trade still open at the end counts towards duration but has no realised PnL
+    if in_trade:
+        trade_durations[n_durations] = current_duration
+        n_durations += 1
+    
+    return trade_pnls[:n_pnls], trade_durations[:n_durations]
+
+
+def _count_position_changes(position):
+    """Number of bars where the position differs from the previous bar"""
+    if position.size < 2:
+        return 0
+    
+    # abs() > 0 leaves NaN diffs uncounted, matching diff().fillna(0)
+    return int(np.count_nonzero(np.abs(np.diff(position)) > 0))
+
+
+def _extract_trade_stats(position, pnl):
+    """Closed-trade PnLs and all trade durations (in bars) for a position/pnl pair"""
+    if NUMBA_AVAILABLE:
+        return _trade_stats_kernel(position, pnl)
+    
+    # Entry/exit edges of each run of non-zero positions
+    active = np.concatenate(([False], position != 0, [False])).astype(np.int8)
+    edges = np.diff(active)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    trade_durations = (ends - starts).astype(np.float64)
+    
+    # Only closed trades count; the entry bar's PnL is excluded and the exit bar's is included
+    closed = ends < len(position)
+    starts, ends = starts[closed], ends[closed]
+    
+    if len(starts) == 0:
+        return np.empty(0), trade_durations
+    
+    # Sum pnl[start+1 : end+1] for every trade in a single reduceat pass
+    padded_pnl = np.append(pnl, 0.0)
+    bounds = np.column_stack((starts + 1, ends + 1)).ravel()
+    trade_pnls = np.add.reduceat(padded_pnl, bounds)[::2]
+    return trade_pnls, trade_durations
+
+
+def _recovery_days(drawdown, timestamps):
+    """Days from the maximum drawdown until drawdown is back within 0.1% of the peak"""
+    if np.isnan(drawdown).all():
+        return 0.0
+    
+    # Find the point of maximum drawdown (positional, NaN bars skipped like idxmin)
+    max_dd_pos = int(np.nanargmin(drawdown))
+    
+    # Find when drawdown returns to 0 (recovery) by scanning the array past the trough
+    recovered = drawdown[max_dd_pos:] >= -0.001
+    recovery_offset = int(np.argmax(recovered))
+    
+    if not recovered[recovery_offset]:
+        # Never recovered
+        return float('inf')
+    
+    recovery_start = timestamps[max_dd_pos]
+    recovery_end = timestamps[max_dd_pos + recovery_offset]
+    
+    recovery_days = int((recovery_end - recovery_start) // np.timedelta64(1, 'D'))
+    return max(0, recovery_days)
+
+
+# Decimal places used when metrics are displayed
+METRIC_DECIMALS = {
+    'total_return': 2,
+    'annual_return': 2,
+    'sharpe': 3,
+    'max_drawdown': 2,
+    'calmar': 3,
+    'win_rate': 2,
+    'sortino': 3,
+    'profit_factor': 2,
+    'time_in_market': 2,
+    'avg_trade_duration': 1,
+    'recovery_time': 0
+}
+
+
+def format_metrics(metrics):
+    """Format raw metric values as display strings (rounding happens only here)"""
+    formatted = {}
+    for name, value in metrics.items():
+        decimals = METRIC_DECIMALS.get(name)
+        if decimals is None or isinstance(value, (int, np.integer)):
+            formatted[name] = str(value)
+        else:
+            formatted[name] = f"{value:.{decimals}f}"
+    return formatted
 
 
 class Analyzer:
@@ -8,30 +276,82 @@ class Analyzer:
     
     def calculate_all_metrics(self, df):
         """Calculate all performance metrics for a backtest DataFrame"""
-        # Ensure required columns exist
-        if 'pnl' not in df.columns:
+        # Ensure required columns exist (prepared once for every metric below)
+        if not {'pnl', 'equity_curve', 'drawdown'}.issubset(df.columns):
             df = self._prepare_data(df)
         
-        pnl_series = df['pnl'].dropna()
+        position = df['position'].to_numpy(dtype=np.float64) if 'position' in df.columns else None
+        timestamps = df['timestamp'].to_numpy() if 'timestamp' in df.columns else None
         
-        if len(pnl_series) == 0 or pnl_series.std() == 0:
+        return self.calculate_metrics_from_arrays(
+            df['pnl'].to_numpy(dtype=np.float64),
+            df['equity_curve'].to_numpy(dtype=np.float64),
+            df['drawdown'].to_numpy(dtype=np.float64),
+            position,
+            timestamps
+        )
+    
+    def calculate_metrics_from_arrays(self, pnl, equity, drawdown, position=None, timestamps=None, moments=None):
+        """Calculate all performance metrics from NumPy arrays of a single backtest (moments: precomputed _PnlMoments)"""
+        pnl = np.asarray(pnl, dtype=np.float64)
+        valid_pnl = _drop_nan(pnl)
+        
+        # Reduce the PnL once and share mean/std across the return and risk ratios
+        if moments is None:
+            moments = _pnl_moments(valid_pnl)
+        
+        if len(valid_pnl) == 0 or moments.std == 0:
             return self._get_empty_metrics()
         
+        # Extract trades once and share them across the trade-based metrics
+        if position is not None:
+            position = np.asarray(position, dtype=np.float64)
+            trade_pnls, trade_durations = _extract_trade_stats(position, pnl)
+        else:
+            trade_pnls, trade_durations = np.empty(0), np.empty(0)
+        
+        equity = np.asarray(equity, dtype=np.float64)
+        drawdown = np.asarray(drawdown, dtype=np.float64)
+        
+        total_return = float((equity[-1] - 1) * 100) if len(equity) else 0.0
+        annual_return = moments.mean * 365 * 100
+        max_drawdown = float(abs(np.fmin.reduce(drawdown) * 100)) if len(drawdown) else 0.0
+        
+        if max_drawdown == 0 or max_drawdown < 0.01:
+            calmar = float('inf') if annual_return > 0 else 0.0
+        else:
+            calmar = annual_return / max_drawdown
+        
+        if position is not None and len(position) > 0:
+            total_trades = _count_position_changes(position)
+            time_in_market = np.count_nonzero(position != 0) / len(position) * 100
+        else:
+            total_trades = 0
+            time_in_market = 0.0
+        
+        win_rate = float((trade_pnls > 0).mean() * 100) if len(trade_pnls) else 0.0
+        avg_trade_duration = float(np.mean(trade_durations)) if len(trade_durations) else 0.0
+        
+        if timestamps is not None:
+            recovery_time = _recovery_days(drawdown, np.asarray(timestamps))
+        else:
+            recovery_time = 0.0
+        
         # Calculate all metrics
         metrics = {
-            'total_return': self.calculate_total_return(df),
-            'annual_return': self.calculate_annual_return(pnl_series),
-            'sharpe': self.calculate_sharpe_ratio(pnl_series),
-            'max_drawdown': self.calculate_max_drawdown(df),
-            'calmar': self.calculate_calmar_ratio(pnl_series, df),
-            'total_trades': self.calculate_total_trades(df),
-            'win_rate': self.calculate_win_rate(df),
-            'sortino': self.calculate_sortino_ratio(pnl_series),
-            'profit_factor': self.calculate_profit_factor(df),
-            'time_in_market': self.calculate_time_in_market(df),
-            'avg_trade_duration': self.calculate_avg_trade_duration(df),
-            'max_consecutive_losses': self.calculate_max_consecutive_losses(df),
-            'recovery_time': self.calculate_recovery_time(df)
+            'total_return': total_return,
+            'annual_return': annual_return,
+            'sharpe': moments.mean / moments.std * np.sqrt(365),
+            'max_drawdown': max_drawdown,
+            'calmar': calmar,
+            'total_trades': total_trades,
+            'win_rate': win_rate,
+            'sortino': self.calculate_sortino_ratio(valid_pnl, moments),
+            'profit_factor': self.calculate_profit_factor(None, trade_pnls),
+            'time_in_market': time_in_market,
+            'avg_trade_duration': avg_trade_duration,
+            'max_consecutive_losses': self.calculate_max_consecutive_losses(None, trade_pnls),
+            'recovery_time': recovery_time
         }
         
         return metrics
@@ -45,23 +365,32 @@ class Analyzer:
             return 0.0
         
         total_return = (df['equity_curve'].iloc[-1] - 1) * 100
-        return round(total_return, 2)
+        return float(total_return)
     
-    def calculate_annual_return(self, pnl_series):
+    def calculate_annual_return(self, pnl_series, moments=None):
         """Calculate annualized return percentage"""
         if len(pnl_series) == 0:
             return 0.0
         
-        annual_return = pnl_series.mean() * 365 * 100
-        return round(annual_return, 2)
+        if moments is None:
+            moments = _pnl_moments(pnl_series)
+        
+        annual_return = moments.mean * 365 * 100
+        return float(annual_return)
     
-    def calculate_sharpe_ratio(self, pnl_series):
+    def calculate_sharpe_ratio(self, pnl_series, moments=None):
         """Calculate Sharpe ratio (annualized)"""
-        if len(pnl_series) == 0 or pnl_series.std() == 0:
+        if len(pnl_series) == 0:
             return 0.0
         
-        sharpe = pnl_series.mean() / pnl_series.std() * np.sqrt(365)
-        return round(sharpe, 3)
+        if moments is None:
+            moments = _pnl_moments(pnl_series)
+        
+        if moments.std == 0:
+            return 0.0
+        
+        sharpe = moments.mean / moments.std * np.sqrt(365)
+        return float(sharpe)
     
     def calculate_max_drawdown(self, df):
         """Calculate maximum drawdown percentage"""
@@ -73,95 +402,99 @@ class Analyzer:
         
         # Max drawdown is the most negative value (largest loss)
         max_drawdown = df['drawdown'].min() * 100
-        return round(abs(max_drawdown), 2)
+        return float(abs(max_drawdown))
     
-    def calculate_calmar_ratio(self, pnl_series, df):
+    def calculate_calmar_ratio(self, pnl_series, df, moments=None):
         """Calculate Calmar ratio (Annual Return / Max Drawdown)"""
-        annual_return = self.calculate_annual_return(pnl_series)
+        annual_return = self.calculate_annual_return(pnl_series, moments)
         max_drawdown = self.calculate_max_drawdown(df)
         
         if max_drawdown == 0 or max_drawdown < 0.01:
             return float('inf') if annual_return > 0 else 0.0
         
         calmar = annual_return / max_drawdown
-        return round(calmar, 3)
+        return float(calmar)
     
     def calculate_total_trades(self, df):
         """Calculate total number of trades (position changes)"""
         if 'position' not in df.columns:
             return 0
         
-        position_changes = df['position'].diff().fillna(0)
-        total_trades = (position_changes != 0).sum()
-        return int(total_trades)
+        return _count_position_changes(df['position'].to_numpy(dtype=np.float64))
     
-    def calculate_win_rate(self, df):
+    def calculate_win_rate(self, df, trade_pnls=None):
         """Calculate win rate percentage"""
         if 'position' not in df.columns or 'pnl' not in df.columns:
             return 0.0
         
-        trade_pnls = self._extract_trade_pnls(df)
+        if trade_pnls is None:
+            trade_pnls = self._extract_trade_pnls(df)
         
         if len(trade_pnls) == 0:
             return 0.0
         
-        win_rate = (np.array(trade_pnls) > 0).mean() * 100
-        return round(win_rate, 2)
+        win_rate = (np.asarray(trade_pnls) > 0).mean() * 100
+        return float(win_rate)
     
-    def calculate_volatility(self, pnl_series):
+    def calculate_volatility(self, pnl_series, moments=None):
         """Calculate annualized volatility"""
         if len(pnl_series) == 0:
             return 0.0
         
-        volatility = pnl_series.std() * np.sqrt(365) * 100
-        return round(volatility, 2)
+        if moments is None:
+            moments = _pnl_moments(pnl_series)
+        
+        volatility = moments.std * np.sqrt(365) * 100
+        return float(volatility)
     
-    def calculate_sortino_ratio(self, pnl_series):
+    def calculate_sortino_ratio(self, pnl_series, moments=None):
         """Calculate Sortino ratio (downside deviation)"""
         if len(pnl_series) == 0:
             return 0.0
         
-        downside_returns = pnl_series[pnl_series < 0]
-        
-        if len(downside_returns) == 0:
-            return 0.0
-        
-        downside_std = downside_returns.std()
+        if moments is None:
+            moments = _pnl_moments(pnl_series)
         
-        if downside_std == 0:
+        if moments.downside_count == 0 or moments.downside_std == 0:
             return 0.0
         
-        sortino = pnl_series.mean() / downside_std * np.sqrt(365)
-        return round(sortino, 3)
+        sortino = moments.mean / moments.downside_std * np.sqrt(365)
+        return float(sortino)
     
-    def calculate_profit_factor(self, df):
+    def calculate_profit_factor(self, df, trade_pnls=None):
         """Calculate profit factor (gross profit / gross loss)"""
-        trade_pnls = self._extract_trade_pnls(df)
+        if trade_pnls is None:
+            trade_pnls = self._extract_trade_pnls(df)
         
         if len(trade_pnls) == 0:
             return 0.0
         
-        gross_profit = sum([pnl for pnl in trade_pnls if pnl > 0])
-        gross_loss = abs(sum([pnl for pnl in trade_pnls if pnl < 0]))
+        trade_pnls = np.asarray(trade_pnls, dtype=np.float64)
+        gross_profit = float(trade_pnls[trade_pnls > 0].sum())
+        gross_loss = float(-trade_pnls[trade_pnls < 0].sum())
         
         if gross_loss == 0:
             return float('inf') if gross_profit > 0 else 0.0
         
         profit_factor = gross_profit / gross_loss
-        return round(profit_factor, 2)
+        return float(profit_factor)
     
-    def calculate_average_trade(self, df):
+    def calculate_average_trade(self, df, trade_pnls=None):
         """Calculate average trade return"""
-        trade_pnls = self._extract_trade_pnls(df)
+        if trade_pnls is None:
+            trade_pnls = self._extract_trade_pnls(df)
         
         if len(trade_pnls) == 0:
             return 0.0
         
         avg_trade = np.mean(trade_pnls) * 100
-        return round(avg_trade, 3)
+        return float(avg_trade)
     
     def calculate_recovery_factor(self, df):
         """Calculate recovery factor (Total Return / Max Drawdown)"""
+        if not {'equity_curve', 'drawdown'}.issubset(df.columns):
+            df = self._prepare_data(df)
+        
         total_return = self.calculate_total_return(df)
         max_drawdown = self.calculate_max_drawdown(df)
         
@@ -169,54 +502,69 @@ class Analyzer:
             return 0.0
         
         recovery_factor = total_return / max_drawdown
-        return round(recovery_factor, 2)
+        return float(recovery_factor)
     
     def _prepare_data(self, df):
         """Prepare DataFrame with required columns for analysis"""
-        df = df.copy()
+        arrays = self._prepare_arrays(df)
         
-        # Calculate returns if not present
+        # Attach only the columns that were missing, without copying the whole frame
+        new_columns = {}
         if 'returns' not in df.columns:
-            df['returns'] = df['close'].pct_change().fillna(0)
-        
-        # Calculate PnL if not present
+            new_columns['returns'] = arrays.returns
         if 'pnl' not in df.columns:
-            df['pnl'] = df['position'].shift(1) * df['returns']
-        
-        # Calculate equity curve if not present
+            new_columns['pnl'] = arrays.pnl
         if 'equity_curve' not in df.columns:
-            df['equity_curve'] = (1 + df['pnl']).cumprod()
-        
-        # Calculate drawdown if not present
+            new_columns['equity_curve'] = arrays.equity
         if 'drawdown' not in df.columns:
-            df['running_max'] = df['equity_curve'].cummax()
-            df['drawdown'] = (df['equity_curve'] - df['running_max']) / df['running_max']
+            new_columns['running_max'] = arrays.running_max
+            new_columns['drawdown'] = arrays.drawdown
         
-        return df
+        return df.assign(**new_columns)
+    
+    def _prepare_arrays(self, df):
+        """Compute returns, PnL, equity and drawdown arrays in a single NumPy pass"""
+        # Calculate returns if not present
+        if 'returns' in df.columns:
+            returns = df['returns'].to_numpy(dtype=np.float64)
+        else:
+            returns = _simple_returns(df['close'].to_numpy(dtype=np.float64))
+        
+        # Calculate PnL if not present (previous bar's position times this bar's return)
+        if 'pnl' in df.columns:
+            pnl = df['pnl'].to_numpy(dtype=np.float64)
+        else:
+            pnl = _position_pnl(df['position'].to_numpy(dtype=np.float64), returns)
+        
+        # Calculate equity curve and drawdown if not present
+        if 'equity_curve' in df.columns:
+            equity = df['equity_curve'].to_numpy(dtype=np.float64)
+            running_max = np.fmax.accumulate(equity)
+            running_max[np.isnan(equity)] = np.nan
+            drawdown = (equity - running_max) / running_max
+        else:
+            equity, running_max, drawdown = _equity_and_drawdown(pnl)
+        
+        if 'drawdown' in df.columns:
+            drawdown = df['drawdown'].to_numpy(dtype=np.float64)
+        
+        return _PreparedArrays(returns, pnl, equity, running_max, drawdown)
     
     def _extract_trade_pnls(self, df):
         """Extract individual trade PnLs from position changes"""
-        trade_pnls = []
-        current_trade_pnl = 0
-        in_trade = False
-        
-        for i, pos in enumerate(df['position']):
-            if pos != 0 and not in_trade:
-                # Entering a trade
-                in_trade = True
-                current_trade_pnl = 0
-            elif pos != 0 and in_trade:
-                # In a trade
-                current_trade_pnl += df['pnl'].iloc[i]
-            elif pos == 0 and in_trade:
-                # Exiting a trade
-                current_trade_pnl += df['pnl'].iloc[i]
-                trade_pnls.append(current_trade_pnl)
-                in_trade = False
-                current_trade_pnl = 0
-        
+        trade_pnls, _ = self._extract_trades(df)
         return trade_pnls
     
+    def _extract_trades(self, df):
+        """Extract closed-trade PnLs and trade durations (in bars) from position changes"""
+        position = df['position'].to_numpy(dtype=np.float64)
+        if 'pnl' in df.columns:
+            pnl = df['pnl'].to_numpy(dtype=np.float64)
+        else:
+            pnl = np.zeros(len(position))
+        
+        return _extract_trade_stats(position, pnl)
+    
     def _get_empty_metrics(self):
         """Return empty metrics dictionary"""
         return {
@@ -247,9 +595,9 @@ class Analyzer:
         print(f"Calmar Ratio: {metrics['calmar']:.3f}")
         
         # Additional metrics
-        pnl_series = df['pnl'].dropna()
-        print(f"Volatility: {self.calculate_volatility(pnl_series):.2f}%")
-        print(f"Sortino Ratio: {self.calculate_sortino_ratio(pnl_series):.3f}")
+        pnl = _drop_nan(df['pnl'].to_numpy(dtype=np.float64))
+        print(f"Volatility: {self.calculate_volatility(pnl):.2f}%")
+        print(f"Sortino Ratio: {metrics['sortino']:.3f}")
         print(f"Profit Factor: {self.calculate_profit_factor(df):.2f}")
         print(f"Recovery Factor: {self.calculate_recovery_factor(df):.2f}")
         
@@ -280,57 +628,38 @@ class Analyzer:
             return 0.0
             
         time_in_market = (invested_periods / total_periods) * 100
-        return round(time_in_market, 2)
+        return float(time_in_market)
     
-    def calculate_avg_trade_duration(self, df):
+    def calculate_avg_trade_duration(self, df, trade_durations=None):
         """Calculate average trade duration in days"""
         if 'position' not in df.columns:
             return 0.0
         
-        trade_durations = []
-        current_duration = 0
-        in_trade = False
-        
-        for pos in df['position']:
-            if pos != 0 and not in_trade:
-                # Entering a trade
-                in_trade = True
-                current_duration = 1
-            elif pos != 0 and in_trade:
-                # In a trade
-                current_duration += 1
-            elif pos == 0 and in_trade:
-                # Exiting a trade
-                trade_durations.append(current_duration)
-                in_trade = False
-                current_duration = 0
-        
-        # If still in trade at end
-        if in_trade:
-            trade_durations.append(current_duration)
+        if trade_durations is None:
+            _, trade_durations = self._extract_trades(df)
         
         if len(trade_durations) == 0:
             return 0.0
         
         avg_duration = np.mean(trade_durations)
-        return round(avg_duration, 1)
+        return float(avg_duration)
     
-    def calculate_max_consecutive_losses(self, df):
+    def calculate_max_consecutive_losses(self, df, trade_pnls=None):
         """Calculate maximum consecutive losing trades"""
-        trade_pnls = self._extract_trade_pnls(df)
+        if trade_pnls is None:
+            trade_pnls = self._extract_trade_pnls(df)
         
         if len(trade_pnls) == 0:
             return 0
         
-        max_consecutive = 0
-        current_consecutive = 0
+        losses = np.asarray(trade_pnls) < 0
         
-        for pnl in trade_pnls:
-            if pnl < 0:
-                current_consecutive += 1
-                max_consecutive = max(max_consecutive, current_consecutive)
-            else:
-                current_consecutive = 0
+        if not losses.any():
+            return 0
+        
+        # Each non-losing trade starts a new group; the longest streak is the largest group of losses
+        streak_ids = np.cumsum(~losses)
+        max_consecutive = np.bincount(streak_ids[losses]).max()
         
         return int(max_consecutive)
     
@@ -339,19 +668,4 @@ class Analyzer:
         if 'drawdown' not in df.columns or 'timestamp' not in df.columns:
             return 0.0
         
-        # Find the point of maximum drawdown
-        max_dd_idx = df['drawdown'].idxmin()
-        
-        # Find when drawdown returns to 0 (recovery)
-        recovery_data = df.loc[max_dd_idx:].copy()
-        recovery_idx = recovery_data[recovery_data['drawdown'] >= -0.001].index
-        
-        if len(recovery_idx) == 0:
-            # Never recovered
-            return float('inf')
-        
-        recovery_start = df.loc[max_dd_idx, 'timestamp']
-        recovery_end = df.loc[recovery_idx[0], 'timestamp']
-        
-        recovery_days = (recovery_end - recovery_start).days
-        return max(0, recovery_days)
\ No newline at end of file
+        return _recovery_days(df['drawdown'].to_numpy(dtype=np.float64), df['timestamp'].to_numpy())
@@ -1,6 +1,69 @@
+import csv
+import os
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Intervals served by the OHLC endpoint (ordered for help messages)
+VALID_INTERVALS = ('10m', '1h', '24h', '1w', '1month')
+
+
+def _epoch_seconds_to_datetime(values):
+    """Convert Unix seconds to datetime64 with a NumPy cast (datetime input is returned unchanged)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.integer):
+        return arr.astype(np.int64).astype('datetime64[s]')
+    
+    # Floats or strings still go through pandas' parser
+    return pd.to_datetime(values, unit='s', cache=True)
+
+
+def read_price_csv(path, columns=None):
+    """Load a saved OHLC CSV with a parsed timestamp column, via a sibling parquet cache when pyarrow is installed.
+    
+    columns limits the result to those columns (timestamp is always kept).
+    """
+    if columns is not None:
+        columns = ['timestamp'] + [col for col in columns if col != 'timestamp']
+    
+    cache_file = os.path.splitext(path)[0] + '.parquet'
+    try:
+        # Reuse the cache unless the CSV was rewritten after it (parquet reads only the requested columns)
+        if os.path.getmtime(cache_file) >= os.path.getmtime(path):
+            return pd.read_parquet(cache_file, columns=columns)
+    except (OSError, ImportError):
+        pass
+    
+    try:
+        df = pd.read_csv(path, engine='pyarrow', parse_dates=['timestamp'])
+    except ImportError:
+        return pd.read_csv(path, usecols=columns, parse_dates=['timestamp'])
+    
+    # The cache keeps every column so later runs can select any subset
+    try:
+        df.to_parquet(cache_file, engine='pyarrow', compression='zstd')
+    except OSError:
+        print(f"Could not write parquet cache {cache_file}, continuing without it")
+    return df[columns] if columns is not None else df
+
 
 class GlassnodeAPI:
     """
@@ -9,6 +72,13 @@ class GlassnodeAPI:
     def __init__(self, api_key):
         self.api_key = api_key
         self.base_url = 'https://api.glassnode.com/v1/metrics/market/price_usd_ohlc'
+        
+        # Reuse one connection pool (keep-alive) and accept compressed responses
+        self.session = requests.Session()
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                              max_retries=Retry(total=3, backoff_factor=0.5))
+        self.session.mount('https://', adapter)
 
     def fetch_btc_data(self, start_time, end_time, interval='1h', 
                       save_file='test_data.csv', format='json'):
@@ -29,23 +99,13 @@ class GlassnodeAPI:
         start_dt = datetime.fromtimestamp(start_time) if isinstance(start_time, (int, float)) else start_time
         end_dt = datetime.fromtimestamp(end_time) if isinstance(end_time, (int, float)) else end_time
         
-        start_timestamp = int(start_dt.timestamp())
-        end_timestamp = int(end_dt.timestamp())
-        
-        params = {
-            'a': 'BTC',
-            'api_key': self.api_key,
-            'i': interval,
-            # 's': start_timestamp,
-            # 'u': end_timestamp,
-            'f': format
-        }
+        params = self._request_params(start_dt, end_dt, interval, format)
         
         print(f"Fetching BTC data: {interval} interval")
         print(f"Period: {start_dt.date()} to {end_dt.date()}")
         print(f"Format: {format}")
         
-        response = requests.get(self.base_url, params=params)
+        response = self.session.get(self.base_url, params=params, timeout=30)
         if response.status_code == 200:
             if format == 'csv':
                 # Handle CSV response from API
@@ -69,35 +129,36 @@ class GlassnodeAPI:
                         column_mapping['c'] = 'close'
                     df = df.rename(columns=column_mapping)
                     
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+                df['timestamp'] = _epoch_seconds_to_datetime(df['timestamp'])
                 
             else:
                 # Handle JSON response with new data structure
                 # Format: [{"t": 1279407600, "o": {"c": 0.04951, "h": 0.04951, "l": 0.04951, "o": 0.04951}}, ...]
-                data = response.json()
+                data = orjson.loads(response.content) if orjson else response.json()
                 if not data:
                     print('No data returned from API')
                     return pd.DataFrame()
                 
-                # Parse new data structure
-                parsed_data = []
-                for item in data:
-                    if 't' in item and 'o' in item:
-                        ohlc = item['o']
-                        parsed_data.append({
-                            'timestamp': item['t'],
-                            'open': ohlc.get('o', 0),
-                            'high': ohlc.get('h', 0), 
-                            'low': ohlc.get('l', 0),
-                            'close': ohlc.get('c', 0)
-                        })
+                # Parse new data structure straight into preallocated arrays
+                records = [item for item in data if 't' in item and 'o' in item]
                 
-                if not parsed_data:
+                if not records:
                     print('No valid OHLC data found in response')
                     return pd.DataFrame()
-                    
-                df = pd.DataFrame(parsed_data)
-                df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+                
+                timestamps = np.fromiter(map(itemgetter('t'), records), dtype=np.int64, count=len(records))
+                ohlc = np.array(
+                    [(v.get('o', 0), v.get('h', 0), v.get('l', 0), v.get('c', 0)) for v in map(itemgetter('o'), records)],
+                    dtype=np.float64
+                )
+                
+                df = pd.DataFrame({
+                    'timestamp': _epoch_seconds_to_datetime(timestamps),
+                    'open': ohlc[:, 0],
+                    'high': ohlc[:, 1],
+                    'low': ohlc[:, 2],
+                    'close': ohlc[:, 3]
+                })
             
             df = df.sort_values('timestamp').reset_index(drop=True)
             
@@ -124,6 +185,105 @@ class GlassnodeAPI:
             print(f'Response: {response.text}')
             return pd.DataFrame()
     
-    def get_available_intervals(self):
+    def download_btc_csv(self, start_time, end_time, interval='1h', save_file='test_data.csv'):
+        """
+        Stream Bitcoin OHLC data from the JSON API straight into a CSV file.
+        
+        Rows are written as they are parsed instead of building a DataFrame. With ijson
+        installed the body is parsed incrementally too, so memory stays flat for long 10m
+        pulls; without it the whole JSON body is loaded first. Rows are sorted by timestamp
+        like fetch_btc_data (the file is re-sorted only if the API returned them out of order).
+        Returns summary statistics (empty dict on failure).
+        """
+        if start_time is None or end_time is None:
+            raise ValueError("start_time and end_time are required parameters")
+        
+        start_dt = datetime.fromtimestamp(start_time) if isinstance(start_time, (int, float)) else start_time
+        end_dt = datetime.fromtimestamp(end_time) if isinstance(end_time, (int, float)) else end_time
+        params = self._request_params(start_dt, end_dt, interval, 'json')
+        
+        print(f"Streaming BTC data: {interval} interval")
+        print(f"Period: {start_dt.date()} to {end_dt.date()}")
+        
+        with self.session.get(self.base_url, params=params, timeout=30, stream=True) as response:
+            if response.status_code != 200:
+                print(f'Failed to fetch data from Glassnode: {response.status_code}')
+                print(f'Response: {response.text}')
+                return {}
+            
+            # Parse incrementally with ijson when available, otherwise load the body once
+            if ijson is not None:
+                response.raw.decode_content = True
+                records = ijson.items(response.raw, 'item')
+            else:
+                records = orjson.loads(response.content) if orjson else response.json()
+            
+            count = 0
+            ordered = True
+            min_ts = max_ts = None
+            min_close = max_close = None
+            
+            with open(save_file, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['timestamp', 'open', 'high', 'low', 'close'])
+                
+                for item in records:
+                    if 't' not in item or 'o' not in item:
+                        continue
+                    
+                    ts = int(item['t'])
+                    values = item['o']
+                    close = float(values.get('c', 0))
+                    writer.writerow([
+                        time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts)),
+                        float(values.get('o', 0)),
+                        float(values.get('h', 0)),
+                        float(values.get('l', 0)),
+                        close
+                    ])
+                    
+                    # Keep only running summary statistics
+                    count += 1
+                    ordered = ordered and (max_ts is None or ts >= max_ts)
+                    min_ts = ts if min_ts is None else min(min_ts, ts)
+                    max_ts = ts if max_ts is None else max(max_ts, ts)
+                    min_close = close if min_close is None else min(min_close, close)
+                    max_close = close if max_close is None else max(max_close, close)
+        
+        if count == 0:
+            print('No valid OHLC data found in response')
+            return {}
+        
+        if not ordered:
+            # Rare path: one extra pass over the written file puts the rows in timestamp order
+            # (read as text, so the values are written back exactly as first formatted)
+            rows = pd.read_csv(save_file, dtype=str)
+            rows.sort_values('timestamp', kind='stable').to_csv(save_file, index=False)
+        
+        print(f"Data saved to {save_file} ({count} records)")
+        return {
+            'count': count,
+            'start': pd.to_datetime(min_ts, unit='s'),
+            'end': pd.to_datetime(max_ts, unit='s'),
+            'min_close': min_close,
+            'max_close': max_close
+        }
+    
+    def _request_params(self, start_dt, end_dt, interval, format):
+        """Query parameters for the OHLC endpoint"""
+        start_timestamp = int(start_dt.timestamp())
+        end_timestamp = int(end_dt.timestamp())
+        
+        return {
+            'a': 'BTC',
+            'api_key': self.api_key,
+            'i': interval,
+            # 's': start_timestamp,
+            # 'u': end_timestamp,
+            'f': format
+        }
+    
+    @staticmethod
+    def get_available_intervals():
         """Return available data intervals"""
-        return ['10m', '1h', '24h', '1w', '1month'] 
\ No newline at end of file
+        return list(VALID_INTERVALS)
@@ -1,27 +1,85 @@
 import pandas as pd
 import numpy as np
-from analyzer import Analyzer
+from analyzer import Analyzer, _simple_returns, _position_pnl, _equity_and_drawdown, _pnl_moments_columns
+from numba_compat import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True, error_model='numpy')
+def _backtest_loop(close, position, returns, pnl, equity, running_max, drawdown):
+    """Returns, position PnL, equity, running max and drawdown in one pass over the bars"""
+    n = close.shape[0]
+    if n == 0:
+        return
+    
+    # The first bar has no return and no previous position
+    returns[0] = 0.0
+    pnl[0] = np.nan
+    equity[0] = np.nan
+    running_max[0] = np.nan
+    drawdown[0] = np.nan
+    
+    current = 1.0
+    peak = -np.inf
+    for i in range(1, n):
+        # Bar-to-bar return (zero wherever it is undefined)
+        r = (close[i] - close[i - 1]) / close[i - 1]
+        returns[i] = 0.0 if np.isnan(r) else r
+        
+        # PnL of the previous bar's position, NaN bars leave the equity untouched
+        pnl[i] = position[i - 1] * returns[i]
+        if np.isnan(pnl[i]):
+            equity[i] = np.nan
+            running_max[i] = np.nan
+            drawdown[i] = np.nan
+            continue
+        
+        # Position-weighted return compounded straight into equity, the peak as a running max
+        current *= 1.0 + pnl[i]
+        peak = max(peak, current)
+        
+        equity[i] = current
+        running_max[i] = peak
+        drawdown[i] = (current - peak) / peak
 
 
 class Backtester:
-    def __init__(self):
+    def __init__(self, precision='float64'):
+        """precision: 'float64' (default) or 'float32' for the equity/drawdown arrays"""
+        if precision not in ('float32', 'float64'):
+            raise ValueError(f"precision must be 'float32' or 'float64', got {precision!r}")
+        
+        self.precision = precision
         self.analyzer = Analyzer()
     
     def run_backtest(self, df, silent=False):
         """Run backtest and return results with equity curve"""
-        df_test = df.copy()
+        close = df['close'].to_numpy(dtype=self.precision)
+        position = df['position'].to_numpy(dtype=self.precision)
         
-        # Calculate returns
-        df_test['returns'] = df_test['close'].pct_change().fillna(0)
+        if NUMBA_AVAILABLE:
+            # Returns, PnL, equity curve and drawdown from a single compiled pass
+            returns, pnl, equity, running_max, drawdown = (np.empty_like(close) for _ in range(5))
+            _backtest_loop(close, position, returns, pnl, equity, running_max, drawdown)
+        else:
+            # Calculate returns and PnL on raw arrays
+            returns = _simple_returns(close)
+            pnl = _position_pnl(position, returns)
+            
+            # Calculate equity curve and drawdown
+            equity, running_max, drawdown = _equity_and_drawdown(pnl)
         
-        # Calculate PnL
-        df_test['pnl'] = df_test['position'].shift(1) * df_test['returns']
-        df_test['cumulative_pnl'] = df_test['pnl'].cumsum()
-        df_test['equity_curve'] = (1 + df_test['pnl']).cumprod()
+        cumulative_pnl = np.nancumsum(pnl)
+        cumulative_pnl[np.isnan(pnl)] = np.nan
         
-        # Calculate drawdown
-        df_test['running_max'] = df_test['equity_curve'].cummax()
-        df_test['drawdown'] = (df_test['equity_curve'] - df_test['running_max']) / df_test['running_max']
+        # Attach the derived columns in one step instead of copying the frame first
+        df_test = df.assign(
+            returns=returns,
+            pnl=pnl,
+            cumulative_pnl=cumulative_pnl,
+            equity_curve=equity,
+            running_max=running_max,
+            drawdown=drawdown
+        )
         
         # Calculate metrics using Analyzer
         metrics = self.analyzer.calculate_all_metrics(df_test)
@@ -32,6 +90,39 @@ class Backtester:
         
         return df_test
     
+    def run_backtest_batch(self, df, positions_matrix):
+        """Backtest several position columns (bars x strategies) against the same prices in one pass"""
+        close = df['close'].to_numpy(dtype=self.precision)
+        positions = np.asarray(positions_matrix, dtype=self.precision)
+        if positions.ndim == 1:
+            positions = positions[:, None]
+        if positions.shape[0] != len(close):
+            raise ValueError(f"positions_matrix has {positions.shape[0]} rows, expected {len(close)}")
+        
+        # Column-major so each strategy's bars are contiguous for the cumulative passes
+        positions = np.asfortranarray(positions)
+        returns = _simple_returns(close)
+        
+        pnl = np.empty(positions.shape, dtype=self.precision, order='F')
+        pnl[:1] = np.nan
+        np.multiply(positions[:-1], returns[1:, None], out=pnl[1:])
+        
+        equity, _, drawdown = _equity_and_drawdown(pnl)
+        
+        # PnL mean/std/downside std for all strategies in one blockwise reduction
+        moments = _pnl_moments_columns(pnl)
+        
+        # Remaining metrics straight from each strategy's column, no per-strategy DataFrame
+        timestamps = df['timestamp'].to_numpy() if 'timestamp' in df.columns else None
+        metrics_list = [
+            self.analyzer.calculate_metrics_from_arrays(
+                pnl[:, i], equity[:, i], drawdown[:, i], positions[:, i], timestamps, moments[i]
+            )
+            for i in range(positions.shape[1])
+        ]
+        
+        return equity, drawdown, metrics_list
+    
     def calculate_metrics(self, df):
         """Calculate performance metrics using Analyzer (for backward compatibility)"""
         return self.analyzer.calculate_all_metrics(df)
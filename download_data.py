@@ -10,17 +10,22 @@ Examples:
 
 import sys
 import os
-from datetime import datetime
+import pandas as pd
 from dotenv import load_dotenv
-from api import GlassnodeAPI
+from api import GlassnodeAPI, VALID_INTERVALS
 
-def parse_date(date_str):
-    """Parse date string to datetime object"""
-    try:
-        return datetime.strptime(date_str, '%Y-%m-%d')
-    except ValueError:
-        print(f"Invalid date format: {date_str}. Use YYYY-MM-DD")
-        return None
+def parse_date(date_strs):
+    """Parse a list of date strings to datetime objects (None for invalid entries)"""
+    parsed = pd.to_datetime(date_strs, format='%Y-%m-%d', errors='coerce', cache=True)
+    
+    dates = []
+    for date_str, ts in zip(date_strs, parsed):
+        if pd.isna(ts):
+            print(f"Invalid date format: {date_str}. Use YYYY-MM-DD")
+            dates.append(None)
+        else:
+            dates.append(ts.to_pydatetime())
+    return dates
 
 def main():
     # Check required arguments
@@ -45,23 +50,22 @@ def main():
     format_type = sys.argv[4] if len(sys.argv) > 4 else 'json'
     
     # Parse dates
-    start_time = parse_date(start_date_str)
-    end_time = parse_date(end_date_str)
+    start_time, end_time = parse_date([start_date_str, end_date_str])
     
     if start_time is None or end_time is None:
         return
     
-    # Validate inputs
-    api = GlassnodeAPI(api_key)
-    valid_intervals = api.get_available_intervals()
-    if interval not in valid_intervals:
-        print(f"Invalid interval: {interval}. Use: {', '.join(valid_intervals)}")
+    # Validate inputs before creating the API client
+    if interval not in VALID_INTERVALS:
+        print(f"Invalid interval: {interval}. Use: {', '.join(VALID_INTERVALS)}")
         return
     
     if format_type not in ['json', 'csv']:
         print(f"Invalid format: {format_type}. Use: json or csv")
         return
     
+    api = GlassnodeAPI(api_key)
+    
     # Create data directory if it doesn't exist
     data_dir = "data"
     os.makedirs(data_dir, exist_ok=True)
@@ -73,19 +77,34 @@ def main():
     print(f"Downloading BTC {interval} data from {start_date_str} to {end_date_str}")
     print(f"API Format: {format_type}, Output: {filename}")
     
-    # Download data
-    df = api.fetch_btc_data(
-        start_time=start_time,
-        end_time=end_time,
-        interval=interval,
-        save_file=filename,
-        format=format_type
-    )
+    # Download data (JSON is streamed straight to the CSV, keeping only summary stats)
+    if format_type == 'json':
+        summary = api.download_btc_csv(
+            start_time=start_time,
+            end_time=end_time,
+            interval=interval,
+            save_file=filename
+        )
+    else:
+        df = api.fetch_btc_data(
+            start_time=start_time,
+            end_time=end_time,
+            interval=interval,
+            save_file=filename,
+            format=format_type
+        )
+        summary = {} if df.empty else {
+            'count': len(df),
+            'start': df['timestamp'].min(),
+            'end': df['timestamp'].max(),
+            'min_close': df['close'].min(),
+            'max_close': df['close'].max()
+        }
     
-    if not df.empty:
-        print(f"✅ Downloaded {len(df)} records to {filename}")
-        print(f"Date range: {df['timestamp'].min().date()} to {df['timestamp'].max().date()}")
-        print(f"Price range: ${df['close'].min():.2f} - ${df['close'].max():.2f}")
+    if summary:
+        print(f"✅ Downloaded {summary['count']} records to {filename}")
+        print(f"Date range: {summary['start'].date()} to {summary['end'].date()}")
+        print(f"Price range: ${summary['min_close']:.2f} - ${summary['max_close']:.2f}")
     else:
         print("❌ Download failed")
 
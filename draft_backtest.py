@@ -1,12 +1,30 @@
 import csv
+import hashlib
 import pandas as pd
 import numpy as np
 import requests
 from dotenv import load_dotenv
 import os
 import plotly.express as px
-import seaborn as sns
 import matplotlib.pyplot as plt
+from numpy.lib.stride_tricks import sliding_window_view
+from numba_compat import njit, prange, NUMBA_AVAILABLE
+from analyzer import _simple_returns
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numexpr as ne
+except ImportError:
+    ne = None
 
 pd.set_option('display.max_rows', 20)
 pd.set_option('display.max_columns', 500)
@@ -20,92 +38,294 @@ since = 1672502400  # 2023 Jan 1
 until = 1735660800  # 2025 Jan 1
 resolution = "24h"
 
-res = requests.get("https://api.glassnode.com/v1/metrics/market/price_usd_close",
-                   params={"a": "BTC", "s": since, "u": until, "api_key": API_KEY, "i": resolution})
-df = pd.read_json(res.text, convert_dates=['t'])
-df = df.rename(columns={'t': 'Date', 'v': 'price'})
-df['chg'] = df['price'].pct_change().fillna(0)
+CACHE_DIR = os.path.join('data', 'cache')
+
+
+def fetch_price(asset, since, until, resolution):
+    """Fetch Glassnode close prices, cached as parquet under data/cache keyed by the request params"""
+    key = hashlib.sha1(f"{asset}_{since}_{until}_{resolution}".encode()).hexdigest()[:16]
+    cache_file = os.path.join(CACHE_DIR, f"price_usd_close_{key}.parquet")
+    if os.path.exists(cache_file):
+        return pd.read_parquet(cache_file)
+    
+    res = requests.get("https://api.glassnode.com/v1/metrics/market/price_usd_close",
+                       params={"a": asset, "s": since, "u": until, "api_key": API_KEY, "i": resolution})
+    rows = orjson.loads(res.content) if orjson else res.json()
+    df = pd.DataFrame.from_records(rows)
+    df = df.rename(columns={'t': 'Date', 'v': 'price'})
+    df['Date'] = pd.to_datetime(df['Date'], unit='s')
+    
+    # Only cache successful, non-empty responses
+    if res.status_code == 200 and len(df) > 0:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            df.to_parquet(cache_file, engine='pyarrow', compression='zstd')
+        except ImportError:
+            print('pyarrow not installed, skipping price cache')
+    
+    return df
+
+
+df = fetch_price("BTC", since, until, resolution)
+
+# Price and change arrays extracted once for every backtest (no derived DataFrame columns)
+price = df['price'].to_numpy(dtype=np.float64)
+chg = _simple_returns(price)
+
+
+def rolling_mean_std(values, window):
+    """Rolling mean and sample std (ddof=1, like pandas rolling().std()) with NaN until the window is full"""
+    window = int(window)
+    if bn is not None:
+        return bn.move_mean(values, window), bn.move_std(values, window, ddof=1)
+    
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    if len(values) >= window:
+        # One strided view serves both reductions; the std reuses the window means
+        windows = sliding_window_view(values, window)
+        mean[window - 1:] = windows.mean(axis=1)
+        dev = windows - mean[window - 1:, None]
+        std[window - 1:] = np.sqrt(np.einsum('ij,ij->i', dev, dev) / (window - 1))
+    return mean, std
+
+
+def shift(values):
+    """Shift an array forward by one bar along the last axis, NaN in the first slot"""
+    out = np.empty(values.shape)
+    out[..., :1] = np.nan
+    out[..., 1:] = values[..., :-1]
+    return out
+
+
+def ffill_nonzero(values):
+    """Carry the last non-zero value forward along the last axis (zeros before the first signal stay 0, dtype kept)"""
+    last_idx = np.where(values != 0, np.arange(values.shape[-1]), -1)
+    np.maximum.accumulate(last_idx, axis=-1, out=last_idx)
+    filled = np.take_along_axis(values, np.maximum(last_idx, 0), axis=-1)
+    return np.where(last_idx >= 0, filled, 0).astype(values.dtype, copy=False)
+
+
+@njit(cache=True)
+def wilder_rsi(prices, window=14):
+    """Wilder's RSI in one pass: SMA seed over the first window, then recursive smoothing"""
+    n = prices.shape[0]
+    rsi = np.full(n, np.nan)
+    avg_gain = 0.0
+    avg_loss = 0.0
+    
+    for i in range(1, n):
+        delta = prices[i] - prices[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        
+        if i <= window:
+            avg_gain += gain / window
+            avg_loss += loss / window
+            if i < window:
+                continue
+        else:
+            avg_gain = (avg_gain * (window - 1) + gain) / window
+            avg_loss = (avg_loss * (window - 1) + loss) / window
+        
+        if avg_loss > 0:
+            rsi[i] = 100 - 100 / (1 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            rsi[i] = 100.0
+    
+    return rsi
 
 
 def calculate_rsi(prices, window=14):
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=window).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=window).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
+    if NUMBA_AVAILABLE:
+        return wilder_rsi(prices, window)
+    
+    # Same recursion via ewm(alpha=1/window, adjust=False) seeded with the first-window average
+    rsi = np.full(len(prices), np.nan)
+    if len(prices) <= window:
+        return rsi
+    
+    delta = np.diff(prices)
+    averages = []
+    for moves in (np.where(delta > 0, delta, 0.0), np.where(delta < 0, -delta, 0.0)):
+        seeded = np.concatenate(([moves[:window].sum() / window], moves[window:]))
+        averages.append(pd.Series(seeded).ewm(alpha=1 / window, adjust=False).mean().to_numpy())
+    avg_gain, avg_loss = averages
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi[window:] = np.where(avg_loss > 0, 100 - 100 / (1 + avg_gain / avg_loss),
+                                np.where(avg_gain > 0, 100.0, np.nan))
     return rsi
 
 
-def backtesting(bb_window, bb_sd_multiplier):
-    df_test = df.copy()
+# RSI (fixed 14-day window) does not depend on the grid, so compute it and its filters once
+rsi = calculate_rsi(price, 14)
+rsi_oversold = rsi < 30
+rsi_overbought = rsi > 70
+
+
+@njit(cache=True, parallel=True)
+def simulate_grid(signals, chg):
+    """Forward-fill each row of raw signals and return PnL mean, std (ddof=1) and max drawdown in one pass"""
+    n_rows, n = signals.shape
+    pnl_mean = np.full(n_rows, np.nan)
+    pnl_std = np.full(n_rows, np.nan)
+    mdd = np.full(n_rows, np.nan)
     
-    # Bollinger Bands
-    df_test['bb_ma'] = df_test['price'].rolling(bb_window).mean()
-    df_test['bb_std'] = df_test['price'].rolling(bb_window).std()
-    df_test['bb_upper'] = df_test['bb_ma'] + (bb_sd_multiplier * df_test['bb_std'])
-    df_test['bb_lower'] = df_test['bb_ma'] - (bb_sd_multiplier * df_test['bb_std'])
+    for r in prange(n_rows):
+        pos = signals[r, 0]
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        cumu = 0.0
+        peak = 0.0
+        max_dd = 0.0
+        
+        for i in range(1, n):
+            # PnL uses the previous bar's (forward-filled) position
+            pnl = pos * chg[i]
+            
+            # Welford update for mean/variance
+            count += 1
+            delta = pnl - mean
+            mean += delta / count
+            m2 += delta * (pnl - mean)
+            
+            cumu += pnl
+            if count == 1 or cumu > peak:
+                peak = cumu
+            if peak - cumu > max_dd:
+                max_dd = peak - cumu
+            
+            if signals[r, i] != 0:
+                pos = signals[r, i]
+        
+        if count > 0:
+            pnl_mean[r] = mean
+            mdd[r] = max_dd
+        if count > 1:
+            pnl_std[r] = np.sqrt(m2 / (count - 1))
     
-    # RSI (fixed 14-day window)
-    df_test['rsi'] = calculate_rsi(df_test['price'], 14)
+    return pnl_mean, pnl_std, mdd
+
+
+def backtesting_grid(bb_window_list, bb_sd_list):
+    """Backtest every (bb_window, bb_sd_multiplier) pair at once on a (windows, multipliers, bars) cube"""
+    windows = np.asarray(bb_window_list)
+    multipliers = np.asarray(bb_sd_list, dtype=np.float64)
     
-    # Trading signals
-    df_test['pos'] = 0
+    # Bollinger Bands: only the mean/std depend on the window, the multiplier is broadcast.
+    # Panels are (windows, bars) in C order so every scan along time is stride-1.
+    bb_ma = np.empty((len(windows), len(price)))
+    bb_std = np.empty((len(windows), len(price)))
+    for i, w in enumerate(windows):
+        bb_ma[i], bb_std[i] = rolling_mean_std(price, w)
+    bb_ma = bb_ma[:, None, :]
+    bb_std = bb_std[:, None, :]
+    k = multipliers[None, :, None]
     
     # Long signal: price touches lower band AND RSI < 30 (oversold)
-    long_condition = (df_test['price'] <= df_test['bb_lower']) & (df_test['rsi'] < 30)
-    df_test.loc[long_condition, 'pos'] = 1
-    
     # Short signal: price touches upper band AND RSI > 70 (overbought)
-    short_condition = (df_test['price'] >= df_test['bb_upper']) & (df_test['rsi'] > 70)
-    df_test.loc[short_condition, 'pos'] = -1
-    
-    # Exit when price returns to middle band
-    exit_condition = (df_test['price'] <= df_test['bb_ma']) & (df_test['pos'].shift(1) == -1)
-    df_test.loc[exit_condition, 'pos'] = 0
+    if ne is not None:
+        # numexpr fuses band arithmetic and comparisons without cube-sized temporaries
+        env = {'p': price, 'ma': bb_ma, 'k': k, 'sd': bb_std,
+               'oversold': rsi_oversold, 'overbought': rsi_overbought}
+        long_signal = ne.evaluate('(p <= ma - k * sd) & oversold', local_dict=env)
+        short_signal = ne.evaluate('(p >= ma + k * sd) & overbought', local_dict=env)
+    else:
+        bb_width = k * bb_std
+        long_signal = (price <= bb_ma - bb_width) & rsi_oversold
+        short_signal = (price >= bb_ma + bb_width) & rsi_overbought
     
-    exit_condition_long = (df_test['price'] >= df_test['bb_ma']) & (df_test['pos'].shift(1) == 1)
-    df_test.loc[exit_condition_long, 'pos'] = 0
+    # Trading signals (int8: the position cube is an eighth of a float64 one)
+    pos = np.zeros((len(windows), len(multipliers), len(price)), dtype=np.int8)
+    pos[long_signal] = 1
+    pos[short_signal] = -1
     
-    # Forward fill positions (hold until exit signal)
-    df_test['pos'] = df_test['pos'].replace(0, np.nan).fillna(method='ffill').fillna(0)
+    # Exit when price returns to middle band
+    pos[(price <= bb_ma) & (shift(pos) == -1)] = 0
+    pos[(price >= bb_ma) & (shift(pos) == 1)] = 0
     
-    # PnL calculation
-    df_test['pnl'] = df_test['pos'].shift(1) * df_test['chg']
-    df_test['cumu'] = df_test['pnl'].cumsum()
-    df_test['dd'] = df_test['cumu'].cummax() - df_test['cumu']
+    if NUMBA_AVAILABLE:
+        # Forward fill, PnL, drawdown and mean/std fused into one compiled pass per grid point
+        pnl_mean, pnl_std, mdd = simulate_grid(pos.reshape(-1, len(price)), chg)
+    else:
+        # Forward fill positions (hold until exit signal)
+        pos = ffill_nonzero(pos)
+        
+        # PnL calculation
+        pnl = shift(pos) * chg
+        cumu = np.nancumsum(pnl, axis=-1)
+        cumu[np.isnan(pnl)] = np.nan
+        dd = np.fmax.accumulate(cumu, axis=-1) - cumu
+        
+        # Performance metrics for every grid point
+        pnl_mean = np.nanmean(pnl, axis=-1).ravel()
+        pnl_std = np.nanstd(pnl, axis=-1, ddof=1).ravel()
+        mdd = np.nanmax(dd, axis=-1).ravel()
     
-    # Performance metrics
-    ar = round(df_test['pnl'].mean() * 365, 3)
-    sr = round(df_test['pnl'].mean() / df_test['pnl'].std() * np.sqrt(365), 3) if df_test['pnl'].std() != 0 else 0
-    mdd = df_test['dd'].max()
-    cr = round(ar / mdd, 3) if mdd != 0 else 0
+    ar = [round(m * 365, 3) for m in pnl_mean]
+    sr = [round(m / sd * np.sqrt(365), 3) if sd != 0 else 0 for m, sd in zip(pnl_mean, pnl_std)]
+    cr = [round(a / d, 3) if d != 0 else 0 for a, d in zip(ar, mdd)]
     
-    return pd.Series([bb_window, bb_sd_multiplier, sr, ar, mdd, cr], 
-                     index=['bb_window', 'bb_sd_multiplier', 'sr', 'ar', 'mdd', 'cr'])
+    return pd.DataFrame({
+        'bb_window': np.repeat(windows, len(multipliers)).astype(np.float64),
+        'bb_sd_multiplier': np.tile(multipliers, len(windows)),
+        'sr': sr,
+        'ar': ar,
+        'mdd': mdd,
+        'cr': cr
+    }, dtype=np.float64)
 
 
 # Parameter ranges for optimization - Simplified
 bb_window_list = np.arange(10, 60, 5)  # BB window: 10,15,20,25,30,35,40,45,50,55
 bb_sd_list = np.arange(1.0, 3.5, 0.25)  # SD multiplier: 1.0,1.25,1.5,1.75,2.0,2.25,2.5,2.75,3.0,3.25
 
-result_list = []
+# Bump when the signal/metric logic changes so stale grid results are not reused
+GRID_VERSION = 1
+
+
+def cached_backtesting_grid(bb_window_list, bb_sd_list):
+    """Run backtesting_grid, reusing a parquet result keyed by the price bytes, grid params and GRID_VERSION"""
+    params = repr((bb_window_list.tolist(), bb_sd_list.tolist(), GRID_VERSION)).encode()
+    key = hashlib.blake2b(price.tobytes() + params).hexdigest()[:16]
+    cache_file = os.path.join(CACHE_DIR, f"grid_{key}.parquet")
+    if os.path.exists(cache_file):
+        return pd.read_parquet(cache_file)
+    
+    result = backtesting_grid(bb_window_list, bb_sd_list)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        result.to_parquet(cache_file, engine='pyarrow', compression='zstd')
+    except ImportError:
+        print('pyarrow not installed, skipping grid cache')
+    return result
+
+
+result_df = cached_backtesting_grid(bb_window_list, bb_sd_list)
 
-for bb_window in bb_window_list:
-    for bb_sd in bb_sd_list:
-        result_list.append(backtesting(bb_window, bb_sd))
+# The grid is a regular window x multiplier product, so the Sharpe matrix is a plain reshape
+sr_matrix = result_df['sr'].to_numpy().reshape(len(bb_window_list), len(bb_sd_list))
 
-result_df = pd.DataFrame(result_list)
 result_df = result_df.sort_values(by='sr', ascending=False)
 print('Best parameters by Sharpe Ratio:')
 print(result_df.head(10))
 
 # Create heatmap for BB window vs SD multiplier
-data_table = result_df.pivot(index='bb_window', columns='bb_sd_multiplier', values='sr')
+data_table = pd.DataFrame(sr_matrix, index=pd.Index(bb_window_list, name='bb_window'),
+                          columns=pd.Index(bb_sd_list, name='bb_sd_multiplier'))
 print('\nHeatmap data (Sharpe Ratio):')
 print(data_table)
 
-plt.figure(figsize=(12, 8))
-sns.heatmap(data_table, cmap='RdYlGn', annot=True, fmt='.3f')
+fig, ax = plt.subplots(figsize=(12, 8))
+im = ax.imshow(sr_matrix, cmap='RdYlGn', aspect='auto')
+fig.colorbar(im, ax=ax)
+ax.set_xticks(np.arange(len(bb_sd_list)), labels=[f'{sd:g}' for sd in bb_sd_list])
+ax.set_yticks(np.arange(len(bb_window_list)), labels=[str(w) for w in bb_window_list])
+for i in range(sr_matrix.shape[0]):
+    for j in range(sr_matrix.shape[1]):
+        ax.text(j, i, f'{sr_matrix[i, j]:.3f}', ha='center', va='center', fontsize=8)
 plt.title('Bollinger Bands + RSI Strategy Optimization\nRSI Filter: Long when RSI<30, Short when RSI>70')
 plt.xlabel('Bollinger Bands SD Multiplier')
 plt.ylabel('Bollinger Bands Window')
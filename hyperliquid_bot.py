@@ -27,10 +27,12 @@ Author: Trading Bot System
 """
 
 import sys
+import asyncio
+import logging
 from datetime import datetime
 import os
 # Import our custom modules
-from hyperliquid_client import HyperliquidClient, my_print
+from hyperliquid_client import HyperliquidClient
 from hyperliquid_strategy import create_strategy
 from dotenv import load_dotenv
 
@@ -78,6 +80,15 @@ SAFETY_FLAGS = {
 # Logging and Display
 VERBOSE = True                        # Enable detailed logging
 
+# %-style arguments are only formatted when the level is enabled (INFO when verbose).
+# The bot attaches no output handler: used as a library, the caller configures logging
+# (e.g. logging.basicConfig(level=logging.INFO)), otherwise verbose INFO output goes nowhere
+log = logging.getLogger("hlbot")
+log.addHandler(logging.NullHandler())
+
+# Run start/finish messages from main(), logged at INFO whatever the bot's verbose setting
+run_log = logging.getLogger("hlbot.main")
+
 
 # ==========================================
 # MAIN TRADING BOT CLASS
@@ -98,6 +109,7 @@ class HyperliquidTradingBot:
         self.config = strategy_config
         self.safety = safety_flags
         self.verbose = verbose
+        log.setLevel(logging.INFO if verbose else logging.WARNING)
         
         # Initialize client and strategy
         try:
@@ -109,9 +121,11 @@ class HyperliquidTradingBot:
                 strategy_type=strategy_config["strategy_type"],
                 custom_params=strategy_config
             )
-            my_print("✓ Bot initialized successfully", self.verbose)
+            # One client per concurrent snapshot request (CCXT's sync exchange isn't thread-safe)
+            self._snapshot_clients = (self.client, self.client.fork(), self.client.fork())
+            log.info("✓ Bot initialized successfully")
         except Exception as e:
-            my_print(f"✗ Bot initialization failed: {e}", True)
+            log.error("✗ Bot initialization failed: %s", e)
             raise
     
     def setup_account(self):
@@ -125,21 +139,45 @@ class HyperliquidTradingBot:
                 self.client.set_leverage(symbol, leverage)
                 self.client.set_margin_mode(symbol, margin_mode, leverage)
                 
-            my_print(f"✓ Account setup: {leverage}x {margin_mode} margin for {symbol}", self.verbose)
+            log.info("✓ Account setup: %sx %s margin for %s", leverage, margin_mode, symbol)
             return True
             
         except Exception as e:
-            my_print(f"✗ Account setup failed: {e}", True)
+            log.error("✗ Account setup failed: %s", e)
             return False
     
-    def get_market_data(self):
-        """Fetch and process market data with indicators."""
+    async def _fetch_snapshot(self):
+        """Fetch OHLCV, balance and positions concurrently (the three requests are independent).
+        
+        Returns:
+            Tuple of (ohlcv, balance_info, positions); a failed request is returned as its exception
+        """
+        symbol = self.config["symbol"]
+        timeframe = self.config["timeframe"]
+        
+        # The CCXT client is synchronous, so each blocking call runs in a worker thread on its own client
+        ohlcv_client, balance_client, positions_client = self._snapshot_clients
+        return await asyncio.gather(
+            asyncio.to_thread(ohlcv_client.fetch_ohlcv, symbol, timeframe, limit=200),
+            asyncio.to_thread(balance_client.fetch_balance),
+            asyncio.to_thread(positions_client.fetch_positions, [symbol]),
+            return_exceptions=True
+        )
+    
+    def get_market_data(self, ohlcv=None):
+        """Fetch and process market data with indicators.
+        
+        Args:
+            ohlcv: Already fetched OHLCV DataFrame (or the exception raised fetching it); fetched here if None
+        """
         try:
             symbol = self.config["symbol"]
             timeframe = self.config["timeframe"]
             
             # Fetch OHLCV data
-            df = self.client.fetch_ohlcv(symbol, timeframe, limit=200)
+            if isinstance(ohlcv, Exception):
+                raise ohlcv
+            df = ohlcv if ohlcv is not None else self.client.fetch_ohlcv(symbol, timeframe, limit=200)
             
             # Compute technical indicators
             df = self.strategy.compute_indicators(df)
@@ -149,31 +187,42 @@ class HyperliquidTradingBot:
             previous_candle = df.iloc[-3] # Previous candle
             current_price = current_candle['close']
             
-            my_print(f"✓ Market data fetched: {symbol} @ ${current_price:.2f}", self.verbose)
+            log.info("✓ Market data fetched: %s @ $%.2f", symbol, current_price)
             
             return df, current_candle, previous_candle, current_price
             
         except Exception as e:
-            my_print(f"✗ Market data fetch failed: {e}", True)
+            log.error("✗ Market data fetch failed: %s", e)
             return None, None, None, None
     
-    def get_account_status(self):
-        """Get current account balance and positions."""
+    def get_account_status(self, balance_info=None, positions=None):
+        """Get current account balance and positions.
+        
+        Args:
+            balance_info: Already fetched balance (or its exception); fetched here if None
+            positions: Already fetched positions list (or its exception); fetched here if None
+        """
         try:
             # Fetch balance
-            balance_info = self.client.fetch_balance()
+            if isinstance(balance_info, Exception):
+                raise balance_info
+            if balance_info is None:
+                balance_info = self.client.fetch_balance()
             balance = float(balance_info["total"]["USDC"])
             
             # Fetch positions
-            positions = self.client.fetch_positions([self.config["symbol"]])
+            if isinstance(positions, Exception):
+                raise positions
+            if positions is None:
+                positions = self.client.fetch_positions([self.config["symbol"]])
             current_position = positions[0] if positions else None
             
-            my_print(f"✓ Account: {balance:.2f} USDC, Positions: {len(positions)}", self.verbose)
+            log.info("✓ Account: %.2f USDC, Positions: %s", balance, len(positions))
             
             return balance, current_position
             
         except Exception as e:
-            my_print(f"✗ Account status fetch failed: {e}", True)
+            log.error("✗ Account status fetch failed: %s", e)
             return 0, None
     
     def manage_existing_position(self, current_position, current_candle, previous_candle):
@@ -183,42 +232,42 @@ class HyperliquidTradingBot:
             position_size = abs(float(current_position["contracts"]))
             symbol = self.config["symbol"]
             
-            my_print(f"Managing {position_side} position: {position_size} contracts", self.verbose)
+            log.info("Managing %s position: %s contracts", position_side, position_size)
             
             # Check long exit
             if position_side == "long" and not self.safety["ignore_longs"] and not self.safety["ignore_exits"]:
                 if self.strategy.check_long_exit_condition(current_candle, previous_candle):
-                    my_print("🔴 Long exit signal detected", self.verbose)
+                    log.info("🔴 Long exit signal detected")
                     
                     if not self.safety["dry_run"]:
                         order = self.client.place_market_order(
                             symbol, "sell", position_size, reduce_only=True
                         )
-                        my_print(f"✓ Long position closed: {order.get('market_order', {}).get('resting')}", self.verbose)
+                        log.info("✓ Long position closed: %s", order.get('market_order', {}).get('resting'))
                     else:
-                        my_print("📋 DRY RUN: Would close long position", self.verbose)
+                        log.info("📋 DRY RUN: Would close long position")
                     
                     return True
             
             # Check short exit
             elif position_side == "short" and not self.safety["ignore_shorts"] and not self.safety["ignore_exits"]:
                 if self.strategy.check_short_exit_condition(current_candle, previous_candle):
-                    my_print("🔴 Short exit signal detected", self.verbose)
+                    log.info("🔴 Short exit signal detected")
                     
                     if not self.safety["dry_run"]:
                         order = self.client.place_market_order(
                             symbol, "buy", position_size, reduce_only=True
                         )
-                        my_print(f"✓ Short position closed: {order.get('market_order', {}).get('resting')}", self.verbose)
+                        log.info("✓ Short position closed: %s", order.get('market_order', {}).get('resting'))
                     else:
-                        my_print("📋 DRY RUN: Would close short position", self.verbose)
+                        log.info("📋 DRY RUN: Would close short position")
                     
                     return True
             
             return False
             
         except Exception as e:
-            my_print(f"✗ Position management failed: {e}", True)
+            log.error("✗ Position management failed: %s", e)
             return False
     
     def check_entry_signals(self, balance, current_candle, previous_candle, current_price):
@@ -228,18 +277,18 @@ class HyperliquidTradingBot:
             
             # Check long entry
             if not self.safety["ignore_longs"] and self.strategy.check_long_entry_condition(current_candle, previous_candle):
-                my_print("🟢 Long entry signal detected", self.verbose)
+                log.info("🟢 Long entry signal detected")
                 return self._open_long_position(balance, current_price)
             
             # Check short entry
             elif not self.safety["ignore_shorts"] and self.strategy.check_short_entry_condition(current_candle, previous_candle):
-                my_print("🟢 Short entry signal detected", self.verbose)
+                log.info("🟢 Short entry signal detected")
                 return self._open_short_position(balance, current_price)
             
             return False
             
         except Exception as e:
-            my_print(f"✗ Entry signal check failed: {e}", True)
+            log.error("✗ Entry signal check failed: %s", e)
             return False
     
     def _open_long_position(self, balance, current_price):
@@ -255,8 +304,8 @@ class HyperliquidTradingBot:
             tp_price = None if self.safety["ignore_tp"] else self.strategy.compute_long_tp_level(current_price)
             sl_price = None if self.safety["ignore_sl"] else self.strategy.compute_long_sl_level(current_price)
             
-            my_print(f"Opening long: ${position_size_usd:.2f} ({amount:.6f} BTC)", self.verbose)
-            my_print(f"Entry: ${current_price:.2f}, TP: ${tp_price:.2f if tp_price else 'None'}, SL: ${sl_price:.2f if sl_price else 'None'}", self.verbose)
+            log.info("Opening long: $%.2f (%.6f BTC)", position_size_usd, amount)
+            log.info("Entry: $%.2f, TP: %s, SL: %s", current_price, tp_price, sl_price)
             
             if not self.safety["dry_run"]:
                 orders = self.client.place_market_order(
@@ -266,18 +315,18 @@ class HyperliquidTradingBot:
                 )
                 
                 if orders.get("market_order"):
-                    my_print(f"✓ Long position opened: {orders['market_order'].get('resting')}", self.verbose)
+                    log.info("✓ Long position opened: %s", orders['market_order'].get('resting'))
                     if orders.get("take_profit_order"):
-                        my_print(f"✓ Take profit set: {orders['take_profit_order'].get('resting')}", self.verbose)
+                        log.info("✓ Take profit set: %s", orders['take_profit_order'].get('resting'))
                     if orders.get("stop_loss_order"):
-                        my_print(f"✓ Stop loss set: {orders['stop_loss_order'].get('resting')}", self.verbose)
+                        log.info("✓ Stop loss set: %s", orders['stop_loss_order'].get('resting'))
             else:
-                my_print("📋 DRY RUN: Would open long position", self.verbose)
+                log.info("📋 DRY RUN: Would open long position")
             
             return True
             
         except Exception as e:
-            my_print(f"✗ Long position opening failed: {e}", True)
+            log.error("✗ Long position opening failed: %s", e)
             return False
     
     def _open_short_position(self, balance, current_price):
@@ -293,8 +342,8 @@ class HyperliquidTradingBot:
             tp_price = None if self.safety["ignore_tp"] else self.strategy.compute_short_tp_level(current_price)
             sl_price = None if self.safety["ignore_sl"] else self.strategy.compute_short_sl_level(current_price)
             
-            my_print(f"Opening short: ${position_size_usd:.2f} ({amount:.6f} BTC)", self.verbose)
-            my_print(f"Entry: ${current_price:.2f}, TP: ${tp_price:.2f if tp_price else 'None'}, SL: ${sl_price:.2f if sl_price else 'None'}", self.verbose)
+            log.info("Opening short: $%.2f (%.6f BTC)", position_size_usd, amount)
+            log.info("Entry: $%.2f, TP: %s, SL: %s", current_price, tp_price, sl_price)
             
             if not self.safety["dry_run"]:
                 orders = self.client.place_market_order(
@@ -304,35 +353,38 @@ class HyperliquidTradingBot:
                 )
                 
                 if orders.get("market_order"):
-                    my_print(f"✓ Short position opened: {orders['market_order'].get('resting')}", self.verbose)
+                    log.info("✓ Short position opened: %s", orders['market_order'].get('resting'))
                     if orders.get("take_profit_order"):
-                        my_print(f"✓ Take profit set: {orders['take_profit_order'].get('resting')}", self.verbose)
+                        log.info("✓ Take profit set: %s", orders['take_profit_order'].get('resting'))
                     if orders.get("stop_loss_order"):
-                        my_print(f"✓ Stop loss set: {orders['stop_loss_order'].get('resting')}", self.verbose)
+                        log.info("✓ Stop loss set: %s", orders['stop_loss_order'].get('resting'))
             else:
-                my_print("📋 DRY RUN: Would open short position", self.verbose)
+                log.info("📋 DRY RUN: Would open short position")
             
             return True
             
         except Exception as e:
-            my_print(f"✗ Short position opening failed: {e}", True)
+            log.error("✗ Short position opening failed: %s", e)
             return False
     
     def run_single_iteration(self):
         """Run a single iteration of the trading bot."""
-        my_print(f"\n{'='*50}", self.verbose)
-        my_print(f"🤖 Bot Run - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", self.verbose)
-        my_print(f"Strategy: {self.config['strategy_type'].upper()} | Symbol: {self.config['symbol']}", self.verbose)
-        my_print(f"{'='*50}", self.verbose)
+        log.info("\n%s", '='*50)
+        log.info("🤖 Bot Run - %s", datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        log.info("Strategy: %s | Symbol: %s", self.config['strategy_type'].upper(), self.config['symbol'])
+        log.info("%s", '='*50)
         
         try:
+            # Market data and account requests overlap instead of running back to back
+            ohlcv, balance_info, positions = asyncio.run(self._fetch_snapshot())
+            
             # 1. Get market data
-            df, current_candle, previous_candle, current_price = self.get_market_data()
+            df, current_candle, previous_candle, current_price = self.get_market_data(ohlcv)
             if df is None:
                 return False
             
             # 2. Get account status
-            balance, current_position = self.get_account_status()
+            balance, current_position = self.get_account_status(balance_info, positions)
             if balance == 0:
                 return False
             
@@ -340,7 +392,7 @@ class HyperliquidTradingBot:
             if current_position:
                 position_closed = self.manage_existing_position(current_position, current_candle, previous_candle)
                 if position_closed:
-                    my_print("✓ Position management completed", self.verbose)
+                    log.info("✓ Position management completed")
                     return True
             
             # 4. Setup account for new positions
@@ -351,15 +403,15 @@ class HyperliquidTradingBot:
                 # 5. Check for entry signals
                 entry_executed = self.check_entry_signals(balance, current_candle, previous_candle, current_price)
                 if entry_executed:
-                    my_print("✓ Entry signal executed", self.verbose)
+                    log.info("✓ Entry signal executed")
                     return True
                 else:
-                    my_print("⏸ No entry signals detected", self.verbose)
+                    log.info("⏸ No entry signals detected")
             
             return True
             
         except Exception as e:
-            my_print(f"✗ Bot iteration failed: {e}", True)
+            log.error("✗ Bot iteration failed: %s", e)
             return False
 
 
@@ -369,12 +421,18 @@ class HyperliquidTradingBot:
 
 def main():
     """Main execution function."""
-    my_print("🚀 Starting Hyperliquid Trading Bot", True)
-    my_print(f"Strategy: {STRATEGY_CONFIG['strategy_type'].upper()}", True)
-    my_print(f"Symbol: {STRATEGY_CONFIG['symbol']}", True)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.setLevel(logging.INFO)
+    logging.getLogger().addHandler(handler)
+    run_log.setLevel(logging.INFO)
+    
+    run_log.info("🚀 Starting Hyperliquid Trading Bot")
+    run_log.info("Strategy: %s", STRATEGY_CONFIG['strategy_type'].upper())
+    run_log.info("Symbol: %s", STRATEGY_CONFIG['symbol'])
     
     if SAFETY_FLAGS["dry_run"]:
-        my_print("📋 DRY RUN MODE - No real trades will be executed", True)
+        run_log.warning("📋 DRY RUN MODE - No real trades will be executed")
     
     try:
         # Initialize bot
@@ -384,17 +442,17 @@ def main():
         success = bot.run_single_iteration()
         
         if success:
-            my_print("✅ Bot run completed successfully", True)
+            run_log.info("✅ Bot run completed successfully")
             sys.exit(0)
         else:
-            my_print("❌ Bot run failed", True)
+            run_log.error("❌ Bot run failed")
             sys.exit(1)
             
     except KeyboardInterrupt:
-        my_print("\n⏹ Bot stopped by user", True)
+        run_log.info("\n⏹ Bot stopped by user")
         sys.exit(0)
     except Exception as e:
-        my_print(f"💥 Critical error: {e}", True)
+        run_log.error("💥 Critical error: %s", e)
         sys.exit(1)
 
 
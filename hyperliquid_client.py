@@ -16,13 +16,50 @@ Author: Trading Bot System
 """
 
 import os
+import copy
+import socket
+import asyncio
+import threading
+from collections import deque
 import ccxt
-import pandas as pd
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from decimal import Decimal, ROUND_HALF_UP
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 load_dotenv()
 
 
+class _TunedAdapter(HTTPAdapter):
+    """HTTPAdapter with Nagle disabled and TCP keep-alive on pooled sockets."""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _make_session() -> requests.Session:
+    """Create a keep-alive session so REST calls reuse one TCP/TLS connection."""
+    session = requests.Session()
+    adapter = _TunedAdapter(pool_connections=1, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _round_half_up(value: Decimal, decimals: int) -> Decimal:
+    """Round to a number of decimal places, ties away from zero (CCXT's ROUND mode)."""
+    return value.quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_UP)
+
+
 class HyperliquidClient:
     """Simple synchronous client for Hyperliquid exchange using CCXT."""
     
@@ -47,11 +84,39 @@ class HyperliquidClient:
                 "privateKey": private_key,
                 "enableRateLimit": True,
             })
+            self.exchange.session = _make_session()
             self.markets = {}
+            self._ohlcv_buffers = {}
+            self._ohlcv_lock = threading.Lock()
+            self._streams = {}
+            self._amount_decimals = {}
+            self._price_decimals = {}
             self._load_markets()
         except Exception as e:
             raise Exception(f"Failed to initialize exchange: {str(e)}")
 
+    def fork(self) -> "HyperliquidClient":
+        """Return a client with its own CCXT exchange, for calls made from another thread.
+        
+        The synchronous CCXT exchange is not thread-safe: its rate-limit throttle, options and market
+        caches and HTTP session are shared mutable state. The fork reuses the loaded markets and
+        precision caches, so it sends no requests of its own on creation. Its rate limiter is separate
+        from this client's, so requests spread over forks are not throttled against each other.
+        
+        Returns:
+            HyperliquidClient sharing this client's markets and OHLCV stream buffers
+        """
+        clone = copy.copy(self)
+        clone.exchange = ccxt.hyperliquid({
+            "walletAddress": self.exchange.walletAddress,
+            "privateKey": self.exchange.privateKey,
+            "enableRateLimit": True,
+            "options": copy.deepcopy(self.exchange.options),
+        })
+        clone.exchange.session = _make_session()
+        clone.exchange.set_markets(self.exchange.markets, self.exchange.currencies)
+        return clone
+
     def _load_markets(self) -> None:
         """Load market data from the exchange."""
         # Loads market information from the exchange to cache symbol data and trading requirements
@@ -59,6 +124,18 @@ class HyperliquidClient:
             self.markets = self.exchange.load_markets()
         except Exception as e:
             raise Exception(f"Failed to load markets: {str(e)}")
+        
+        # Cache per-symbol decimal places so order formatting skips CCXT's string arithmetic
+        for symbol, market in self.markets.items():
+            try:
+                amount_decimals = self.exchange.precision_from_string(
+                    self.exchange.number_to_string(market["precision"]["amount"])
+                )
+            except Exception:
+                continue
+            max_decimals = 8 if market.get("spot") is True else 6
+            self._amount_decimals[symbol] = amount_decimals
+            self._price_decimals[symbol] = max_decimals - amount_decimals
 
     def _amount_to_precision(self, symbol: str, amount: float) -> float:
         """Convert amount to exchange precision requirements.
@@ -71,6 +148,13 @@ class HyperliquidClient:
             Amount formatted with correct precision as float
         """
         # Formats order amounts according to exchange precision requirements to avoid order rejection
+        decimals = self._amount_decimals.get(symbol)
+        if decimals is not None:
+            result = float(_round_half_up(Decimal(repr(amount)), decimals))
+            if result == 0 and amount > 0:
+                raise Exception(f"Failed to format amount precision: amount of {symbol} must be greater than minimum amount precision")
+            return result
+        
         try:
             result = self.exchange.amount_to_precision(symbol, amount)
             return float(result)
@@ -88,6 +172,15 @@ class HyperliquidClient:
             Price formatted with correct precision as float
         """
         # Formats prices according to exchange precision requirements for proper order formatting
+        decimals = self._price_decimals.get(symbol)
+        if decimals is not None:
+            # Hyperliquid: at least 5 significant digits (all integer digits kept), then max decimals
+            value = Decimal(repr(price))
+            if value != 0:
+                significant = max(5, value.adjusted() + 1)
+                value = _round_half_up(value, significant - 1 - value.adjusted())
+            return float(_round_half_up(value, decimals))
+        
         try:
             result = self.exchange.price_to_precision(symbol, price)
             return float(result)
@@ -134,12 +227,58 @@ class HyperliquidClient:
         # Fetches active positions, filtering out zero-size positions to show only actual holdings
         try:
             positions = self.exchange.fetch_positions(symbols)
-            return [pos for pos in positions if float(pos["contracts"]) != 0]
+            # CCXT already parses contracts to float (None when missing), so a truthiness check suffices
+            return [pos for pos in positions if pos["contracts"]]
         except Exception as e:
             raise Exception(f"Failed to fetch positions: {str(e)}")
 
-    def fetch_ohlcv(self, symbol: str, timeframe: str = "1d", limit: int = 100) -> pd.DataFrame:
-        """Fetch OHLCV candlestick data.
+    def fetch_account_snapshot(self, symbols: list[str] = None, include_mids: bool = True) -> dict:
+        """Fetch balance, open positions and mid prices in as few info requests as possible.
+        
+        Args:
+            symbols: Trading pairs to keep positions for (all if None)
+            include_mids: Also fetch current mid prices with one allMids request
+            
+        Returns:
+            Dict with 'balance' (same shape as fetch_balance for the perp account), 'positions'
+            (same as fetch_positions) and 'mids' (symbol -> mid price, empty if not requested)
+        """
+        # One clearinghouseState request carries both the margin summary and the asset positions,
+        # which fetch_balance and fetch_positions would each request separately
+        try:
+            exchange = self.exchange
+            state = exchange.publicPostInfo({"type": "clearinghouseState", "user": exchange.walletAddress})
+            
+            summary = state.get("marginSummary", {})
+            timestamp = exchange.safe_integer(state, "time")
+            balance = exchange.safe_balance({
+                "info": state,
+                "USDC": {
+                    "total": exchange.safe_number(summary, "accountValue"),
+                    "used": exchange.safe_number(summary, "totalMarginUsed"),
+                },
+                "timestamp": timestamp,
+                "datetime": exchange.iso8601(timestamp),
+            })
+            
+            positions = [exchange.parse_position(item) for item in state.get("assetPositions", [])]
+            if symbols is not None:
+                positions = [pos for pos in positions if pos["symbol"] in symbols]
+            positions = [pos for pos in positions if pos["contracts"]]
+            
+            mids = {}
+            if include_mids:
+                all_mids = exchange.publicPostInfo({"type": "allMids"})
+                for symbol, market in self.markets.items():
+                    if market.get("swap") and market.get("baseName") in all_mids:
+                        mids[symbol] = float(all_mids[market["baseName"]])
+            
+            return {"balance": balance, "positions": positions, "mids": mids}
+        except Exception as e:
+            raise Exception(f"Failed to fetch account snapshot: {str(e)}")
+
+    def fetch_ohlcv_array(self, symbol: str, timeframe: str = "1d", limit: int = 100) -> tuple:
+        """Fetch OHLCV candlestick data as NumPy arrays.
         
         Args:
             symbol: Trading pair symbol
@@ -147,25 +286,138 @@ class HyperliquidClient:
             limit: Maximum number of candles to fetch
             
         Returns:
-            DataFrame with OHLCV data indexed by timestamp
+            Tuple of (timestamps, open, high, low, close, volume); timestamps are int64 ms, prices float64
         """
-        # Fetches historical OHLCV candlestick data and returns a pandas DataFrame with timestamp index and numeric columns
+        # Slices columns out of the single float64 candle matrix, skipping pandas entirely
+        arr = self._fetch_ohlcv_matrix(symbol, timeframe, limit)
+        timestamps = arr[:, 0].astype(np.int64)
+        return timestamps, arr[:, 1], arr[:, 2], arr[:, 3], arr[:, 4], arr[:, 5]
+
+    def _fetch_ohlcv_matrix(self, symbol: str, timeframe: str, limit: int) -> np.ndarray:
+        """Fetch candles as one (n, 6) float64 matrix sorted by timestamp."""
+        # Converts the candle list in one float64 allocation
         try:
             ohlcv_data = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
             
-            df = pd.DataFrame(
-                data=ohlcv_data,
-                columns=["timestamp", "open", "high", "low", "close", "volume"]
-            )
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-            df = df.set_index("timestamp").sort_index()
-            
-            numeric_cols = ["open", "high", "low", "close", "volume"]
-            df[numeric_cols] = df[numeric_cols].astype(float)
-            
-            return df
+            arr = np.asarray(ohlcv_data, dtype=np.float64).reshape(-1, 6)
+            if len(arr) > 1 and np.any(arr[1:, 0] < arr[:-1, 0]):
+                arr = arr[np.argsort(arr[:, 0], kind="stable")]
+            return arr
         except Exception as e:
             raise Exception(f"Failed to fetch OHLCV data: {str(e)}")
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1d", limit: int = 100) -> "pd.DataFrame":
+        """Fetch OHLCV candlestick data.
+        
+        Args:
+            symbol: Trading pair symbol
+            timeframe: Candle interval (1m, 5m, 15m, 30m, 1h, 4h, 12h, 1d)
+            limit: Maximum number of candles to fetch
+            
+        Returns:
+            DataFrame with OHLCV data indexed by timestamp
+        """
+        # Builds the frame straight from the float64 candle matrix: one 2-D block, no per-column copies or casts.
+        # pandas is imported here so clients that only trade or use fetch_ohlcv_array never load it
+        import pandas as pd
+        
+        arr = self._fetch_ohlcv_matrix(symbol, timeframe, limit)
+        
+        index = pd.DatetimeIndex(arr[:, 0].astype(np.int64).astype("datetime64[ms]"), name="timestamp")
+        return pd.DataFrame(
+            np.ascontiguousarray(arr[:, 1:]),
+            index=index,
+            columns=["open", "high", "low", "close", "volume"],
+            copy=False
+        )
+    
+    def subscribe_ohlcv(self, symbol: str, timeframe: str = "1h", limit: int = 200, callback=None) -> None:
+        """Keep a local OHLCV buffer updated from the websocket candle stream.
+        
+        Args:
+            symbol: Trading pair symbol
+            timeframe: Candle interval (1m, 5m, 15m, 30m, 1h, 4h, 12h, 1d)
+            limit: Number of candles kept in the buffer
+            callback: Optional callback(symbol, timeframe, candle) called on each update (stream thread)
+        """
+        # Seeds the buffer over REST once, then a background thread applies pushed candle updates so
+        # get_ohlcv_snapshot needs no network round-trip
+        key = (symbol, timeframe)
+        if key in self._ohlcv_buffers:
+            return
+        
+        try:
+            candles = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        except Exception as e:
+            raise Exception(f"Failed to subscribe to OHLCV data: {str(e)}")
+        
+        buffer = deque(sorted(candles, key=lambda candle: candle[0]), maxlen=limit)
+        self._ohlcv_buffers[key] = buffer
+        
+        # Each stream gets its own stop event, so a subscription made after close_streams starts fresh
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=asyncio.run,
+            args=(self._watch_ohlcv(symbol, timeframe, buffer, callback, stop),),
+            name=f"ohlcv-{symbol}-{timeframe}",
+            daemon=True
+        )
+        self._streams[key] = (thread, stop)
+        thread.start()
+
+    async def _watch_ohlcv(self, symbol: str, timeframe: str, buffer: deque, callback, stop: threading.Event) -> None:
+        """Internal coroutine that merges streamed candles into a buffer until its stop event is set."""
+        import ccxt.pro as ccxtpro
+        
+        exchange = ccxtpro.hyperliquid({"enableRateLimit": True})
+        try:
+            while not stop.is_set():
+                try:
+                    candles = await exchange.watch_ohlcv(symbol, timeframe)
+                except Exception as e:
+                    my_print(f"OHLCV stream error for {symbol} {timeframe}: {str(e)}")
+                    await asyncio.sleep(1)
+                    continue
+                
+                with self._ohlcv_lock:
+                    for candle in candles:
+                        if buffer and candle[0] == buffer[-1][0]:
+                            buffer[-1] = candle
+                        elif not buffer or candle[0] > buffer[-1][0]:
+                            buffer.append(candle)
+                
+                if callback is not None and candles:
+                    callback(symbol, timeframe, candles[-1])
+        finally:
+            await exchange.close()
+
+    def get_ohlcv_snapshot(self, symbol: str, timeframe: str = "1h") -> np.ndarray:
+        """Return the streamed candles as an (n, 6) float64 array [timestamp, open, high, low, close, volume].
+        
+        Args:
+            symbol: Trading pair symbol
+            timeframe: Candle interval passed to subscribe_ohlcv
+            
+        Returns:
+            Candle matrix sorted by timestamp (ms)
+        """
+        # Reads the local buffer only; subscribe_ohlcv must have been called first
+        buffer = self._ohlcv_buffers.get((symbol, timeframe))
+        if buffer is None:
+            raise Exception(f"No OHLCV subscription for {symbol} {timeframe}")
+        
+        with self._ohlcv_lock:
+            return np.asarray(buffer, dtype=np.float64).reshape(-1, 6)
+
+    def close_streams(self) -> None:
+        """Stop all websocket subscriptions (each stops after its next update) and drop their buffers."""
+        # Dropping the buffers makes get_ohlcv_snapshot raise instead of serving stale candles,
+        # and lets subscribe_ohlcv start the same symbol/timeframe again
+        with self._ohlcv_lock:
+            for key, (_, stop) in self._streams.items():
+                stop.set()
+                self._ohlcv_buffers.pop(key, None)
+            self._streams.clear()
     
     def set_leverage(self, symbol: str, leverage: int) -> bool:
         """Set leverage for a symbol.
@@ -209,7 +461,8 @@ class HyperliquidClient:
         amount: float,
         reduce_only: bool = False,
         take_profit_price: float = None,
-        stop_loss_price: float = None
+        stop_loss_price: float = None,
+        price: float = None
     ) -> dict:
         """Place a market order with optional take profit and stop loss.
         
@@ -220,52 +473,118 @@ class HyperliquidClient:
             reduce_only: If True, order will only reduce position size
             take_profit_price: Optional price level to take profit
             stop_loss_price: Optional price level to stop loss
+            price: Reference price for the slippage bound (mid price from market data if None)
             
         Returns:
             Order execution details
         """
-        # Places market orders with optional take-profit and stop-loss levels. Formats amounts/prices and handles order chaining for TP/SL
+        # Places market orders with optional take-profit and stop-loss levels. Formats amounts/prices and sends
+        # the entry and its TP/SL as one batched order action (one signed request, one rate-limit weight)
         try:
             formatted_amount = self._amount_to_precision(symbol, amount)
             
-            price = self.get_current_price(symbol)
-            formatted_price = self._price_to_precision(symbol, price)
+            # CCXT needs a reference price for the market order slippage bound and rounds it
+            # after applying slippage, so it is passed through unformatted
+            if price is None:
+                price = self.get_current_price(symbol)
             
-            params = {"reduceOnly": reduce_only}
+            names = ["market_order"]
+            requests_batch = [{
+                "symbol": symbol,
+                "type": "market",
+                "side": side,
+                "amount": formatted_amount,
+                "price": price,
+                "params": {"reduceOnly": reduce_only},
+            }]
+            
+            # TP/SL close the position on the opposite side; CCXT rounds their trigger prices itself
+            close_side = "sell" if side == "buy" else "buy"
             
             if take_profit_price is not None:
-                formatted_tp_price = self._price_to_precision(symbol, take_profit_price)
-                params["takeProfitPrice"] = formatted_tp_price
+                names.append("take_profit_order")
+                requests_batch.append(self._take_profit_order_request(symbol, close_side, formatted_amount, price, take_profit_price))
                 
             if stop_loss_price is not None:
-                formatted_sl_price = self._price_to_precision(symbol, stop_loss_price)
-                params["stopLossPrice"] = formatted_sl_price
-            
-            order_info = {}
-            order_info_final = {}
+                names.append("stop_loss_order")
+                requests_batch.append(self._stop_loss_order_request(symbol, close_side, formatted_amount, price, stop_loss_price))
             
-            order_info["market_order"] = self.exchange.create_order(
-                symbol=symbol,
-                type="market",
-                side=side,
-                amount=formatted_amount,
-                price=formatted_price,
-                params=params
-            )
-            order_info_final["market_order"] = order_info["market_order"]["info"]
+            orders = self.exchange.create_orders(requests_batch)
             
-            if take_profit_price is not None:
-                order_info["take_profit_order"] = self._place_take_profit_order(symbol, side, formatted_amount, formatted_price, take_profit_price)
-                order_info_final["take_profit_order"] = order_info["take_profit_order"]["info"]
-                
-            if stop_loss_price is not None:
-                order_info["stop_loss_order"] = self._place_stop_loss_order(symbol, side, formatted_amount, formatted_price, stop_loss_price)
-                order_info_final["stop_loss_order"] = order_info["stop_loss_order"]["info"]
+            order_info_final = {}
+            for name, order in zip(names, orders):
+                order_info_final[name] = order["info"]
             
             return order_info_final
         except Exception as e:
             raise Exception(f"Failed to place market order: {str(e)}")
 
+    def create_order_draft(
+        self,
+        symbol: str,
+        side: str,
+        amount: float,
+        price: float = None,
+        reduce_only: bool = False
+    ) -> dict:
+        """Format and sign a market order ahead of time so it can be fired later with send_order_draft.
+        
+        Args:
+            symbol: Trading pair symbol
+            side: "buy" or "sell"
+            amount: Order size in contracts
+            price: Reference price for the slippage bound (current mid price if None)
+            reduce_only: If True, order will only reduce position size
+            
+        Returns:
+            Draft dict holding the signed exchange request
+        """
+        # Precision formatting, nonce and EIP-712 signing happen here, off the latency-critical path.
+        # The slippage bound is fixed at draft time, so drafts should be refreshed as the price moves.
+        try:
+            self.exchange.initialize_client()
+            
+            formatted_amount = self._amount_to_precision(symbol, amount)
+            if price is None:
+                price = self.get_current_price(symbol)
+            formatted_price = self._price_to_precision(symbol, price)
+            
+            request = self.exchange.create_orders_request([{
+                "symbol": symbol,
+                "type": "market",
+                "side": side,
+                "amount": formatted_amount,
+                "price": formatted_price,
+                "params": {"reduceOnly": reduce_only},
+            }])
+            
+            return {
+                "symbol": symbol,
+                "side": side,
+                "amount": formatted_amount,
+                "price": formatted_price,
+                "request": request,
+            }
+        except Exception as e:
+            raise Exception(f"Failed to create order draft: {str(e)}")
+
+    def send_order_draft(self, draft: dict) -> dict:
+        """Send a pre-signed order draft created by create_order_draft.
+        
+        Args:
+            draft: Draft returned by create_order_draft
+            
+        Returns:
+            Order execution details
+        """
+        # Posts the cached signed body directly, skipping formatting, signing and request building
+        try:
+            response = self.exchange.privatePostExchange(draft["request"])
+            statuses = response.get("response", {}).get("data", {}).get("statuses", [])
+            return {"market_order": statuses[0] if statuses else None}
+        except Exception as e:
+            raise Exception(f"Failed to send order draft: {str(e)}")
+
     def place_limit_order(
         self,
         symbol: str,
@@ -339,38 +658,35 @@ class HyperliquidClient:
                 amount=contract_amount,
                 reduce_only=reduce_only,
                 take_profit_price=take_profit_price,
-                stop_loss_price=stop_loss_price
+                stop_loss_price=stop_loss_price,
+                price=current_price
             )
         except Exception as e:
             raise Exception(f"Failed to place USD market order: {str(e)}")
 
-    def _place_take_profit_order(self, symbol: str, side: str, amount: float, price: float, take_profit_price: float) -> dict:
-        """Internal method to place a take-profit order."""
-        # Internal helper to create take-profit orders with opposite side and reduce-only flag
-        tp_price = self._price_to_precision(symbol, take_profit_price)
-        close_side = "sell" if side == "buy" else "buy"
-        return self.exchange.create_order(
-                symbol=symbol,
-                type="market",
-                side=close_side,
-                amount=amount,
-                price=price,
-                params={"takeProfitPrice": tp_price, "reduceOnly": True},
-            )
+    def _take_profit_order_request(self, symbol: str, close_side: str, amount: float, price: float, take_profit_price: float) -> dict:
+        """Internal method to build a take-profit order request for create_orders."""
+        # Internal helper to describe take-profit orders on the closing side with reduce-only flag
+        return {
+            "symbol": symbol,
+            "type": "market",
+            "side": close_side,
+            "amount": amount,
+            "price": price,
+            "params": {"takeProfitPrice": take_profit_price, "reduceOnly": True},
+        }
 
-    def _place_stop_loss_order(self, symbol: str, side: str, amount: float, price: float, stop_loss_price: float) -> dict:
-        """Internal method to place a stop-loss order."""
-        # Internal helper to create stop-loss orders with opposite side and reduce-only flag
-        sl_price = self._price_to_precision(symbol, stop_loss_price)
-        close_side = "sell" if side == "buy" else "buy"
-        return self.exchange.create_order(
-                symbol=symbol,
-                type="market",
-                side=close_side,
-                amount=amount,
-                price=price,
-                params={"stopLossPrice": sl_price, "reduceOnly": True},
-            )
+    def _stop_loss_order_request(self, symbol: str, close_side: str, amount: float, price: float, stop_loss_price: float) -> dict:
+        """Internal method to build a stop-loss order request for create_orders."""
+        # Internal helper to describe stop-loss orders on the closing side with reduce-only flag
+        return {
+            "symbol": symbol,
+            "type": "market",
+            "side": close_side,
+            "amount": amount,
+            "price": price,
+            "params": {"stopLossPrice": stop_loss_price, "reduceOnly": True},
+        }
 
 
 # Utility function for printing with verbosity control
@@ -390,10 +706,11 @@ if __name__ == "__main__":
         
         if wallet_address and private_key:
             client = HyperliquidClient(wallet_address, private_key)
-            balance = client.fetch_balance()
-            print(f"Account Balance: {balance['total']['USDC']} USDC")
+            snapshot = client.fetch_account_snapshot()
+            print(f"Account Balance: {snapshot['balance']['total']['USDC']} USDC")
+            print(f"Open Positions: {len(snapshot['positions'])}")
             
-            btc_price = client.get_current_price("BTC/USDC:USDC")
+            btc_price = snapshot["mids"].get("BTC/USDC:USDC")
             print(f"BTC Price: ${btc_price}")
         else:
             print("Please set HYPERLIQUID_WALLET_ADDRESS and HYPERLIQUID_PRIVATE_KEY in .env for testing")
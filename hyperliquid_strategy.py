@@ -11,23 +11,84 @@ Author: Trading Bot System
 
 import pandas as pd
 import numpy as np
+from dataclasses import dataclass, fields, asdict
+from typing import Union
+from numba_compat import NUMBA_AVAILABLE
+from indicators_nb import _rolling_mean_std_kernel, _zero_flat_std
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+
+def _zscore_arrays(close: np.ndarray, window: int) -> tuple:
+    """Rolling z-score and mean arrays via the shared Numba kernel, bottleneck, or pandas rolling as a last resort"""
+    if NUMBA_AVAILABLE and window > 1:
+        ma, std = _rolling_mean_std_kernel(close, window)
+    else:
+        if bn is not None and window > 1:
+            # Two C passes straight on the array (ddof=1 to match pandas rolling().std())
+            ma = bn.move_mean(close, window)
+            std = bn.move_std(close, window, ddof=1)
+        else:
+            prices = pd.Series(close)
+            ma = prices.rolling(window).mean().to_numpy()
+            std = prices.rolling(window).std().to_numpy()
+        std = _zero_flat_std(ma, std, window)
+    
+    # A flat window (std 0) has no z-score: NaN like pandas, never ±inf off rounding noise
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(std > 0, (close - ma) / std, np.nan), ma
+
+
+@dataclass(frozen=True, slots=True)
+class ZScoreParams:
+    """Typed Z-Score strategy parameters (attribute access instead of dict lookups)."""
+    symbol: str = "BTC/USDC:USDC"
+    timeframe: str = "1h"
+    position_size_pct: float = 5.0
+    leverage: int = 1
+    margin_mode: str = "isolated"
+    ma_window: int = 50               # Moving average window
+    zscore_threshold: float = 2.0     # Entry threshold
+    zscore_exit: float = 0.5          # Exit threshold
+    tp_pct: float = 5.0               # Take profit %
+    sl_pct: float = 3.0               # Stop loss %
+    
+    @classmethod
+    def from_dict(cls, params: dict) -> "ZScoreParams":
+        """Build from a config dict, casting each key to its field type.
+        
+        Raises:
+            ValueError: If the dict has keys that aren't fields (a misspelt key would
+                otherwise fall back to its default without notice)
+        """
+        known = {f.name: f.type for f in fields(cls)}
+        unknown = sorted(set(params) - known.keys())
+        if unknown:
+            raise ValueError(f"Unknown strategy parameter(s): {', '.join(unknown)}")
+        return cls(**{name: known[name](value) for name, value in params.items()})
 
 
 class ZScoreStrategy:
     """Simple Z-Score mean reversion strategy."""
     
-    def __init__(self, params: dict):
+    def __init__(self, params):
         """Initialize strategy with parameters.
         
         Args:
-            params: Dictionary containing strategy parameters
+            params: ZScoreParams, or a dictionary of strategy parameters
                 - ma_window: Moving average window (default: 50)
                 - zscore_threshold: Z-score threshold for entry (default: 2.0)
                 - position_size_pct: Position size as % of balance (default: 5.0)
                 - tp_pct: Take profit percentage (default: 5.0)
                 - sl_pct: Stop loss percentage (default: 3.0)
         """
-        self.params = params
+        self.params = params if isinstance(params, ZScoreParams) else ZScoreParams.from_dict(params)
+        
+        # (window, index, close, zscore, ma) from the last calculate_zscore call
+        self._zscore_cache = None
         
     def calculate_zscore(self, prices: pd.Series, window: int) -> tuple:
         """Calculate z-score: (price - moving_average) / standard_deviation
@@ -39,9 +100,47 @@ class ZScoreStrategy:
         Returns:
             Tuple of (zscore, moving_average)
         """
-        ma = prices.rolling(window).mean()
-        std = prices.rolling(window).std()
-        zscore = (prices - ma) / std
+        zscore, ma = self._incremental_zscore(prices.index, prices.to_numpy(dtype=np.float64), int(window))
+        return (pd.Series(zscore, index=prices.index, name=prices.name),
+                pd.Series(ma, index=prices.index, name=prices.name))
+    
+    def _incremental_zscore(self, index: pd.Index, close: np.ndarray, window: int) -> tuple:
+        """Reuse the previous call's values for bars whose window is unchanged and compute only the new tail.
+        
+        In a live loop each new fetch shares most of its candles with the previous one, so only the
+        appended (or revised) bars need work. Falls back to a full pass when the histories don't line up.
+        """
+        n = len(close)
+        reuse = 0
+        cache = self._zscore_cache
+        
+        if cache is not None and cache[0] == window and n > 0:
+            _, old_index, old_close, old_zscore, old_ma = cache
+            offset = old_index.get_indexer(index[:1])[0] if old_index.is_unique else -1
+            if offset >= 0:
+                overlap = min(len(old_index) - offset, n)
+                if index[:overlap].equals(old_index[offset:offset + overlap]):
+                    old = old_close[offset:offset + overlap]
+                    same = (old == close[:overlap]) | (np.isnan(old) & np.isnan(close[:overlap]))
+                    # Bars before the first changed close keep their values (e.g. a revised last candle)
+                    reuse = overlap if same.all() else int(np.argmin(same))
+        
+        if reuse >= window:
+            zscore = np.empty(n)
+            ma = np.empty(n)
+            zscore[:reuse] = old_zscore[offset:offset + reuse]
+            ma[:reuse] = old_ma[offset:offset + reuse]
+            # Bars without a full window inside the new history are undefined again
+            zscore[:window - 1] = np.nan
+            ma[:window - 1] = np.nan
+            
+            tail_zscore, tail_ma = _zscore_arrays(close[reuse - window + 1:], window)
+            zscore[reuse:] = tail_zscore[window - 1:]
+            ma[reuse:] = tail_ma[window - 1:]
+        else:
+            zscore, ma = _zscore_arrays(close, window)
+        
+        self._zscore_cache = (window, index, close.copy(), zscore.copy(), ma.copy())
         return zscore, ma
     
     def compute_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
@@ -51,15 +150,28 @@ class ZScoreStrategy:
             data: OHLCV DataFrame with timestamp index
             
         Returns:
-            DataFrame with added zscore and ma columns
+            DataFrame with added zscore, ma, long_entry and long_exit columns
         """
-        df = data.copy()
-        window = self.params.get('ma_window', 50)
+        window = self.params.ma_window
+        threshold = self.params.zscore_threshold
+        exit_threshold = self.params.zscore_exit
         
         # Calculate Z-score and moving average
-        df['zscore'], df['ma'] = self.calculate_zscore(df['close'], window)
+        zscore, ma = self.calculate_zscore(data['close'], window)
+        z = zscore.to_numpy()
         
-        return df
+        # Crossover written straight into a preallocated mask (the first bar has no previous z-score)
+        long_entry = np.zeros(len(z), dtype=bool)
+        np.logical_and(z[:-1] <= threshold, z[1:] > threshold, out=long_entry[1:])
+        
+        # assign() only adds the new columns instead of copying every OHLCV column first.
+        # Entry/exit flags are computed for every candle at once, so the per-candle checks are a lookup
+        return data.assign(
+            zscore=z,
+            ma=ma.to_numpy(),
+            long_entry=long_entry,
+            long_exit=z < exit_threshold
+        )
     
     def generate_signals(self, data: pd.DataFrame) -> pd.DataFrame:
         """Generate trading signals based on Z-score.
@@ -71,7 +183,7 @@ class ZScoreStrategy:
             DataFrame with position signals (1 = long, 0 = neutral)
         """
         df = self.compute_indicators(data)
-        threshold = self.params.get('zscore_threshold', 2.0)
+        threshold = self.params.zscore_threshold
         
         # Simple vectorized position logic: 1 if zscore > threshold, else 0
         df['position'] = np.where(df['zscore'] > threshold, 1, 0)
@@ -88,7 +200,10 @@ class ZScoreStrategy:
         Returns:
             True if should enter long position
         """
-        threshold = self.params.get('zscore_threshold', 2.0)
+        if 'long_entry' in current_candle.index:
+            return bool(current_candle['long_entry'])
+        
+        threshold = self.params.zscore_threshold
         
         # Entry when Z-score crosses above threshold
         return (previous_candle.get('zscore', 0) <= threshold < current_candle.get('zscore', 0))
@@ -103,7 +218,10 @@ class ZScoreStrategy:
         Returns:
             True if should exit long position
         """
-        exit_threshold = self.params.get('zscore_exit', 0.5)
+        if 'long_exit' in current_candle.index:
+            return bool(current_candle['long_exit'])
+        
+        exit_threshold = self.params.zscore_exit
         
         # Exit when Z-score drops below exit threshold (back to normal)
         return current_candle.get('zscore', 0) < exit_threshold
@@ -120,47 +238,36 @@ class ZScoreStrategy:
         """Check if short exit conditions are met."""
         return False  # Disabled for long-only strategy
     
-    def compute_long_tp_level(self, entry_price: float) -> float:
-        """Calculate long position take profit level."""
-        return entry_price * (1 + self.params.get("tp_pct", 5.0) / 100)
+    def compute_long_tp_level(self, entry_price: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Calculate long position take profit level (element-wise for arrays of entry prices)."""
+        return entry_price * (1 + self.params.tp_pct / 100)
     
-    def compute_long_sl_level(self, entry_price: float) -> float:
-        """Calculate long position stop loss level."""
-        return entry_price * (1 - self.params.get("sl_pct", 3.0) / 100)
+    def compute_long_sl_level(self, entry_price: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Calculate long position stop loss level (element-wise for arrays of entry prices)."""
+        return entry_price * (1 - self.params.sl_pct / 100)
     
-    def compute_short_tp_level(self, entry_price: float) -> float:
-        """Calculate short position take profit level."""
-        return entry_price * (1 - self.params.get("tp_pct", 5.0) / 100)
+    def compute_short_tp_level(self, entry_price: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Calculate short position take profit level (element-wise for arrays of entry prices)."""
+        return entry_price * (1 - self.params.tp_pct / 100)
     
-    def compute_short_sl_level(self, entry_price: float) -> float:
-        """Calculate short position stop loss level."""
-        return entry_price * (1 + self.params.get("sl_pct", 3.0) / 100)
+    def compute_short_sl_level(self, entry_price: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Calculate short position stop loss level (element-wise for arrays of entry prices)."""
+        return entry_price * (1 + self.params.sl_pct / 100)
     
-    def calculate_position_size(self, balance: float) -> float:
+    def calculate_position_size(self, balance: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
         """Calculate position size based on account balance.
         
         Args:
-            balance: Available account balance in USDC
+            balance: Available account balance in USDC (scalar or array, e.g. a backtest equity curve)
             
         Returns:
             Position size in USD value
         """
-        return balance * self.params.get("position_size_pct", 5.0) / 100
+        return balance * self.params.position_size_pct / 100
 
 
 # Default parameters matching your existing strategy
-DEFAULT_ZSCORE_PARAMS = {
-    "symbol": "BTC/USDC:USDC",
-    "timeframe": "1h",
-    "position_size_pct": 5.0,
-    "leverage": 1,
-    "margin_mode": "isolated",
-    "ma_window": 50,                  # Moving average window
-    "zscore_threshold": 2.0,          # Entry threshold
-    "zscore_exit": 0.5,              # Exit threshold
-    "tp_pct": 5.0,                   # Take profit %
-    "sl_pct": 3.0,                   # Stop loss %
-}
+DEFAULT_ZSCORE_PARAMS = asdict(ZScoreParams())
 
 
 def create_strategy(strategy_type: str = "zscore", custom_params: dict = None) -> ZScoreStrategy:
@@ -176,9 +283,10 @@ def create_strategy(strategy_type: str = "zscore", custom_params: dict = None) -
     # Use default Z-Score parameters
     params = DEFAULT_ZSCORE_PARAMS.copy()
     
-    # Override with custom parameters
+    # Override with custom parameters (a bot config also carries its strategy_type)
     if custom_params:
         params.update(custom_params)
+        params.pop("strategy_type", None)
     
     return ZScoreStrategy(params)
 
@@ -0,0 +1,110 @@
+"""
+Numba indicator kernels shared by the backtesting strategies and the live Z-Score strategy.
+
+The kernels are compiled with `cache=True`, so the machine code is written
+next to this module and later processes load it instead of compiling again.
+When Numba is installed they are also compiled once at import, before
+`Optimizer` starts its worker processes. That way the workers all read a
+ready cache and do not compile the same kernels in parallel. Callers check
+`NUMBA_AVAILABLE` and use their NumPy/pandas path when Numba is missing.
+"""
+
+import numpy as np
+from numba_compat import njit, NUMBA_AVAILABLE
+
+
+# Population variance at or below this fraction of mean**2 counts as a flat window: its std is
+# reported as exactly 0 (as pandas gives for a constant window) rather than leftover rounding error
+_FLAT_VAR_RTOL = 1e-12
+
+
+@njit(cache=True)
+def _rolling_mean_std_kernel(values, window):
+    """Rolling mean and sample std (ddof=1) in one O(n) pass, NaN while the window holds a NaN, 0 when flat"""
+    n = values.shape[0]
+    mean_out = np.full(n, np.nan)
+    std_out = np.full(n, np.nan)
+    last_nan = -1
+    seeded = -1
+    mean = 0.0
+    m2 = 0.0
+    
+    for i in range(n):
+        x = values[i]
+        if np.isnan(x):
+            last_nan = i
+            continue
+        
+        start = i - window + 1
+        if start < 0 or start <= last_nan:
+            continue
+        
+        if start == last_nan + 1 or i - seeded >= window:
+            # First full window without NaN, and then once per window length (bounds the
+            # rounding drift of the sliding update at O(n) total cost): seed the accumulators directly
+            seeded = i
+            mean = 0.0
+            for j in range(start, i + 1):
+                mean += values[j]
+            mean /= window
+            m2 = 0.0
+            for j in range(start, i + 1):
+                m2 += (values[j] - mean) ** 2
+        else:
+            # Slide the window (Welford update, stable where a raw sum of squares cancels)
+            old = values[start - 1]
+            delta = x - old
+            new_mean = mean + delta / window
+            m2 += delta * (x - new_mean + old - mean)
+            mean = new_mean
+        
+        mean_out[i] = mean
+        std_out[i] = np.sqrt(m2 / (window - 1)) if m2 > _FLAT_VAR_RTOL * mean * mean * window else 0.0
+    
+    return mean_out, std_out
+
+
+def _zero_flat_std(mean, std, window):
+    """Std with the kernel's flat-window rule (0 when flat) applied to a mean/std pair from bottleneck or pandas"""
+    with np.errstate(invalid='ignore'):
+        return np.where(std * std * (window - 1) <= _FLAT_VAR_RTOL * mean * mean * window, 0.0, std)
+
+
+@njit(cache=True)
+def _rsi_kernel(close, window):
+    """Wilder RSI in one pass, matching ta.momentum.rsi (ewm alpha=1/window, adjust=False, min_periods=window)"""
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    alpha = 1.0 / window
+    keep = 1.0 - alpha
+    avg_up = 0.0
+    avg_down = 0.0
+    
+    for i in range(n):
+        # Undefined differences (first bar, NaN prices) count as no move, like ta's diff().where(...)
+        diff = close[i] - close[i - 1] if i > 0 else np.nan
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        
+        if i == 0:
+            avg_up = up
+            avg_down = down
+        else:
+            # Same update and normalisation as pandas' adjust=False ewm
+            avg_up = (keep * avg_up + alpha * up) / (keep + alpha)
+            avg_down = (keep * avg_down + alpha * down) / (keep + alpha)
+        
+        if i >= window - 1:
+            rsi[i] = 100.0 if avg_down == 0 else 100.0 - 100.0 / (1.0 + avg_up / avg_down)
+    return rsi
+
+
+def _warmup():
+    """Compile (or load from the on-disk cache) every kernel for the argument types the strategies pass"""
+    values = np.linspace(1.0, 2.0, 8)
+    _rolling_mean_std_kernel(values, 3)
+    _rsi_kernel(values, 3)
+
+
+if NUMBA_AVAILABLE:
+    _warmup()
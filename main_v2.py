@@ -1,50 +1,68 @@
 from strategy import Strategy
 from strategy_v2 import StrategyV2
-from api import GlassnodeAPI
+from api import GlassnodeAPI, read_price_csv
 from dotenv import load_dotenv
-import pandas as pd
 import os
-import glob
+import argparse
 from datetime import datetime
 
 # Load environment variables from .env file
 load_dotenv()
 GLASSNODE_APIKEY = os.getenv('GLASSNODE_APIKEY')
 
-def select_data_file():
+def parse_args():
+    """Parse command line flags that skip the interactive data prompt"""
+    parser = argparse.ArgumentParser(description="Backtest Bitcoin strategies on local CSV or Glassnode data")
+    parser.add_argument('--data-file', help="CSV file to load without prompting")
+    parser.add_argument('--from-api', action='store_true', help="Fetch data from the Glassnode API without prompting")
+    return parser.parse_args()
+
+def select_data_file(data_file=None, from_api=False, columns=None):
     """
     Prompt user to select a CSV file from data folder or fetch from Glassnode API.
+    A data_file or from_api choice given up front (e.g. from the command line) skips the prompt.
+    columns limits a loaded CSV to the columns the strategies use.
     """
+    if data_file:
+        print(f"Loading data from {os.path.basename(data_file)}...")
+        return read_price_csv(data_file, columns)
+    
     # Check if data folder exists and has CSV files
     data_dir = "data"
-    if os.path.exists(data_dir):
-        csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
-        if csv_files:
-            print("Available CSV files in data folder:")
-            for i, file in enumerate(csv_files, 1):
-                filename = os.path.basename(file)
-                print(f"{i}: {filename}")
-            
-            print(f"{len(csv_files) + 1}: Fetch new data from Glassnode API")
-            
-            while True:
-                try:
-                    choice = int(input("Select an option: "))
-                    if 1 <= choice <= len(csv_files):
-                        selected_file = csv_files[choice - 1]
-                        print(f"Loading data from {os.path.basename(selected_file)}...")
-                        return pd.read_csv(selected_file, parse_dates=['timestamp'])
-                    elif choice == len(csv_files) + 1:
-                        break
-                    else:
-                        print(f"Invalid choice. Please enter 1-{len(csv_files) + 1}")
-                except ValueError:
-                    print("Please enter a valid number")
+    csv_files = []
+    if not from_api:
+        try:
+            with os.scandir(data_dir) as entries:
+                csv_files = [entry.path for entry in entries if entry.name.endswith('.csv') and entry.is_file()]
+        except FileNotFoundError:
+            pass
+    
+    if csv_files:
+        print("Available CSV files in data folder:")
+        for i, file in enumerate(csv_files, 1):
+            filename = os.path.basename(file)
+            print(f"{i}: {filename}")
+        
+        print(f"{len(csv_files) + 1}: Fetch new data from Glassnode API")
+        
+        while True:
+            try:
+                choice = int(input("Select an option: "))
+                if 1 <= choice <= len(csv_files):
+                    selected_file = csv_files[choice - 1]
+                    print(f"Loading data from {os.path.basename(selected_file)}...")
+                    return read_price_csv(selected_file, columns)
+                elif choice == len(csv_files) + 1:
+                    break
+                else:
+                    print(f"Invalid choice. Please enter 1-{len(csv_files) + 1}")
+            except ValueError:
+                print("Please enter a valid number")
     
     # Fallback to API
     print('Fetching data from Glassnode API...')
     api = GlassnodeAPI(api_key=GLASSNODE_APIKEY)
-    data = api.fetch_btc_data()
+    data = api.fetch_btc_data(start_time=datetime(2010, 7, 17), end_time=datetime.now(), save_file=None)
     data.to_csv('glassnode_data.csv', index=False)
     return data
 
@@ -53,9 +71,12 @@ def filter_data_by_date_range(df, start_date, end_date):
     print(f"\n=== Filtering Data ===")
     print(f"Original data: {len(df)} records from {df['timestamp'].min().date()} to {df['timestamp'].max().date()}")
     
-    # Filter by date range
-    mask = (df['timestamp'] >= start_date) & (df['timestamp'] <= end_date)
-    filtered_df = df[mask].copy().reset_index(drop=True)
+    # Filter by date range with a binary search on the sorted timestamps (a slice, no boolean mask)
+    if not df['timestamp'].is_monotonic_increasing:
+        df = df.sort_values('timestamp', ignore_index=True)
+    lo = df['timestamp'].searchsorted(start_date, side='left')
+    hi = df['timestamp'].searchsorted(end_date, side='right')
+    filtered_df = df.iloc[lo:hi].reset_index(drop=True)
     
     print(f"Filtered data: {len(filtered_df)} records from {filtered_df['timestamp'].min().date()} to {filtered_df['timestamp'].max().date()}")
     
@@ -72,7 +93,8 @@ def main():
     print("=== Bitcoin Z-Score Strategy Comparison: V1 vs V2 ===")
     
     # Load data
-    data = select_data_file()
+    args = parse_args()
+    data = select_data_file(args.data_file, args.from_api, columns=['timestamp', 'close'])
     
     # Set date range for testing
     start_date = datetime.strptime('2020-05-11', '%Y-%m-%d')
@@ -0,0 +1,22 @@
+"""
+Optional Numba support.
+
+Numba is an optional accelerator for the backtesting hot paths. When it is
+installed, functions decorated with `njit` are compiled to machine code.
+Without it, `njit` is a no-op and callers should check `NUMBA_AVAILABLE`
+to pick their NumPy implementation instead of running the kernel as
+plain Python. `prange` falls back to the builtin `range`.
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when Numba is not installed"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -1,14 +1,123 @@
 import pandas as pd
 import numpy as np
-from itertools import product
+from itertools import chain, product
+from analyzer import METRIC_DECIMALS
+
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
+# Strategy attributes read by its backtest, so the optimize_parameters memo must key on them
+_RESULT_SETTINGS = ('transaction_cost', 'position_size')
+
+
+def _param_values(start, stop, step):
+    """Grid values start, start + step, ... up to stop inclusive, without float drift past the endpoint"""
+    n = int(np.floor((stop - start) / step + 1e-9)) + 1
+    end = start + (n - 1) * step
+    values = np.linspace(start, stop if np.isclose(end, stop) else end, n)
+    
+    # Integer ranges (e.g. windows) stay integers
+    if all(isinstance(v, (int, np.integer)) for v in (start, stop, step)):
+        return values.round().astype(np.int64)
+    return values
+
+
+def _run_one(strategy, backtester, params, indicators=None):
+    """Backtest a single parameter combination, returning its metrics row (None on error)"""
+    try:
+        # Generate signals with current parameters (only the threshold step when indicators are precomputed)
+        if indicators is not None:
+            df_signals = strategy.signals_from_indicators(indicators, threshold=params['threshold'])
+        else:
+            df_signals = strategy.generate_signals(
+                window=params['window'],
+                threshold=params['threshold']
+            )
+        
+        # Run full backtest using Backtester (includes data prep + metrics)
+        df_backtest = backtester.run_backtest(df_signals, silent=True)
+        
+        # Extract metrics from backtest results
+        metrics = backtester.calculate_metrics(df_backtest)
+        
+        return {
+            'window': params['window'],
+            'threshold': params['threshold'],
+            **metrics
+        }
+    
+    except Exception as e:
+        print(f"Error with params {params}: {e}")
+        return None
+
+
+def _run_window(strategy, backtester, param_list):
+    """Backtest the combinations sharing one window, computing the strategy's indicators once when it can"""
+    indicators = None
+    if hasattr(strategy, 'compute_indicators'):
+        try:
+            indicators = strategy.compute_indicators(window=param_list[0]['window'])
+        except Exception as e:
+            print(f"Error with window {param_list[0]['window']}: {e}")
+            return [None] * len(param_list)
+    
+    return [_run_one(strategy, backtester, params, indicators) for params in param_list]
+
+
+def _collect_results(runs, n_total):
+    """DataFrame of the metrics rows yielded by a grid run (None for failed combinations), printing progress"""
+    # Rows are written by grid position into a preallocated structured array
+    results = None
+    valid = np.zeros(n_total, dtype=bool)
+    
+    for i, result in enumerate(runs):
+        if (i + 1) % 10 == 0 or i == 0:
+            print(f"Progress: {i + 1}/{n_total}")
+        
+        if result is None:
+            continue
+        
+        if results is None:
+            # Column names come from the first successful combination
+            results = np.empty(n_total, dtype=[(key, np.float64) for key in result])
+            int_keys = {key for key, value in result.items() if isinstance(value, (int, np.integer))}
+        
+        # Columns whose values are all ints (window, trade counts) are restored as int64 below
+        int_keys = {key for key in int_keys if isinstance(result[key], (int, np.integer))}
+        results[i] = tuple(result.values())
+        valid[i] = True
+    
+    if results is None:
+        return pd.DataFrame()
+    return pd.DataFrame(results[valid]).astype({key: np.int64 for key in int_keys})
 
 
 class Optimizer:
     def __init__(self, strategy_instance, backtester):
         self.strategy = strategy_instance
         self.backtester = backtester
+        self._last_opt = None  # ((param_ranges, metric, data, settings) key, results DataFrame) of the last grid search
+    
+    def clear_cache(self):
+        """Forget the last grid search (call after changing the strategy's data or settings)"""
+        self._last_opt = None
+    
+    def _data_key(self):
+        """Cheap fingerprint of the strategy's data: object identity, length and the last row's time and close"""
+        data = self.strategy.data
+        if len(data) == 0:
+            return (id(data), 0)
+        last = data.iloc[-1]
+        return (id(data), len(data), last.get('timestamp', data.index[-1]), float(last['close']))
     
-    def optimize_parameters(self, param_ranges, metric='sharpe'):
+    def _settings_key(self):
+        """Strategy and backtester settings that change the grid's results (cost and sizing where the strategy has them)"""
+        settings = {name: getattr(self.strategy, name) for name in _RESULT_SETTINGS if hasattr(self.strategy, name)}
+        return (tuple(sorted(settings.items())), self.backtester.precision)
+    
+    def optimize_parameters(self, param_ranges, metric='sharpe', n_jobs=-1):
         """
         Optimize strategy parameters using grid search
         
@@ -16,60 +125,91 @@ class Optimizer:
             param_ranges: dict with parameter ranges
                 e.g., {'window': (10, 60, 5), 'threshold': (1.0, 3.5, 0.25)}
             metric: optimization target ('sharpe', 'calmar', 'annual_return')
+            n_jobs: worker processes for the grid (-1 = all cores, 1 = serial)
         
         Returns:
             DataFrame with optimization results
+        
+        The last result is memoized by (param_ranges, metric), the strategy's cost and sizing
+        settings, the backtester precision and a fingerprint of the strategy's data (replaced
+        frame, new or revised last bar), so find_best_parameters and
+        analyze_parameter_sensitivity on the same grid run it once. Edits elsewhere in the
+        data aren't detected; see clear_cache().
         """
         print(f"\n=== Optimizing Strategy Parameters ===")
         print(f"Target metric: {metric}")
         
+        key = (repr(sorted(param_ranges.items())), metric, self._data_key(), self._settings_key())
+        if self._last_opt is not None and self._last_opt[0] == key:
+            print("Reusing results of the previous identical grid search")
+            return self._last_opt[1].copy()
+        
         # Generate parameter combinations
         param_combinations = self._generate_param_combinations(param_ranges)
         print(f"Total combinations to test: {len(param_combinations)}")
         
-        results = []
-        
-        for i, params in enumerate(param_combinations):
-            if (i + 1) % 10 == 0 or i == 0:
-                print(f"Progress: {i + 1}/{len(param_combinations)}")
-            
-            try:
-                # Generate signals with current parameters
-                df_signals = self.strategy.generate_signals(
-                    window=params['window'],
-                    threshold=params['threshold']
-                )
-                
-                # Run full backtest using Backtester (includes data prep + metrics)
-                df_backtest = self.backtester.run_backtest(df_signals, silent=True)
-                
-                # Extract metrics from backtest results
-                metrics = self.backtester.calculate_metrics(df_backtest)
-                
-                # Store results
-                result = {
-                    'window': params['window'],
-                    'threshold': params['threshold'],
-                    **metrics
-                }
-                results.append(result)
-                
-            except Exception as e:
-                print(f"Error with params {params}: {e}")
-                continue
+        # Window x threshold grids on a strategy with a position-matrix interface are swept in bulk
+        if set(param_ranges) == {'window', 'threshold'} and hasattr(self.strategy, 'generate_position_matrix'):
+            runs = self._vectorized_sweep(param_combinations)
+        # Otherwise each window group is independent, so spread them over a process pool when joblib is installed.
+        # The price arrays inside the strategy's DataFrame are dumped to a read-only memmap once per run
+        # and shared by the workers instead of being pickled into every task.
+        elif Parallel is not None and n_jobs != 1:
+            parallel = Parallel(n_jobs=n_jobs, backend='loky', batch_size='auto', return_as='generator',
+                                max_nbytes='1M', mmap_mode='r')
+            runs = chain.from_iterable(parallel(
+                delayed(_run_window)(self.strategy, self.backtester, param_list)
+                for param_list in self._group_by_window(param_combinations)
+            ))
+        else:
+            runs = chain.from_iterable(
+                _run_window(self.strategy, self.backtester, param_list)
+                for param_list in self._group_by_window(param_combinations)
+            )
         
         # Convert to DataFrame and sort by target metric
-        results_df = pd.DataFrame(results)
+        results_df = _collect_results(runs, len(param_combinations))
         results_df = results_df.sort_values(metric, ascending=False)
         
         # Print top results
         print(f"\nTop 10 parameter combinations by {metric}:")
         display_cols = ['window', 'threshold', 'sharpe', 'sortino', 'annual_return', 'max_drawdown', 'calmar', 'profit_factor', 'time_in_market']
         available_cols = [col for col in display_cols if col in results_df.columns]
-        print(results_df[available_cols].head(10).to_string(index=False))
+        print(results_df[available_cols].head(10).round(METRIC_DECIMALS).to_string(index=False))
         
+        self._last_opt = (key, results_df.copy())
         return results_df
     
+    def _group_by_window(self, param_combinations):
+        """Split the combinations into consecutive runs that share a window (the grid's outer loop)"""
+        groups = []
+        for params in param_combinations:
+            if groups and groups[-1][0]['window'] == params['window']:
+                groups[-1].append(params)
+            else:
+                groups.append([params])
+        return groups
+    
+    def _vectorized_sweep(self, param_combinations):
+        """Yield metrics rows for a window x threshold grid, one z-score pass and one batch backtest per window"""
+        # Group thresholds by window, keeping the grid order of the combinations
+        thresholds_by_window = {}
+        for params in param_combinations:
+            thresholds_by_window.setdefault(params['window'], []).append(params['threshold'])
+        
+        for window, thresholds in thresholds_by_window.items():
+            try:
+                positions = self.strategy.generate_position_matrix(window, thresholds)
+                _, _, metrics_list = self.backtester.run_backtest_batch(self.strategy.data, positions)
+            except Exception as e:
+                print(f"Error with window {window}: {e}")
+                for _ in thresholds:
+                    yield None
+                continue
+            
+            for threshold, metrics in zip(thresholds, metrics_list):
+                yield {'window': window, 'threshold': threshold, **metrics}
+    
     def _generate_param_combinations(self, param_ranges):
         """Generate all parameter combinations from ranges"""
         param_lists = {}
@@ -78,7 +218,7 @@ class Optimizer:
             if isinstance(param_range, tuple) and len(param_range) == 3:
                 # (start, stop, step) format
                 start, stop, step = param_range
-                param_lists[param] = np.arange(start, stop + step, step)
+                param_lists[param] = _param_values(start, stop, step)
             elif isinstance(param_range, (list, tuple)):
                 # List of values
                 param_lists[param] = param_range
@@ -1,56 +1,180 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
 import pandas as pd
 import numpy as np
 
 
+def _pyplot():
+    """Import matplotlib on first use (HEADLESS=1 selects the non-GUI Agg backend)"""
+    import matplotlib
+    if os.environ.get('HEADLESS'):
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    plt.style.use('default')
+    return plt
+
+
+def _lttb_indices(values, n_out):
+    """Row indices of a Largest-Triangle-Three-Buckets downsample of one series to n_out points"""
+    n = len(values)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    y = np.asarray(values, dtype=np.float64)
+    x = np.arange(n, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    
+    # Keep the end points, then pick the point in each bucket spanning the largest
+    # triangle with the previous pick and the average of the next bucket
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indices[i + 1] = a
+    return indices
+
+
+def _add_markers(ax, timestamps, values, marker, size, color, label, alpha=1.0):
+    """Draw date-indexed markers as one prebuilt PathCollection (what scatter builds, minus its argument handling)"""
+    import matplotlib.dates as mdates
+    from matplotlib.collections import PathCollection
+    from matplotlib.markers import MarkerStyle
+    from matplotlib.transforms import IdentityTransform
+    
+    style = MarkerStyle(marker)
+    path = style.get_path().transformed(style.get_transform())
+    offsets = np.column_stack([mdates.date2num(np.asarray(timestamps)), np.asarray(values, dtype=np.float64)])
+    
+    markers = PathCollection([path], sizes=[size], offsets=offsets, offset_transform=ax.transData,
+                             facecolors=color, edgecolors='face', alpha=alpha, label=label, zorder=5)
+    # Marker paths are in points (sized by `sizes`), only the offsets live in data coordinates
+    markers.set_transform(IdentityTransform())
+    ax.add_collection(markers)
+    return markers
+
+
+def _signal_rows(position):
+    """Row indices of long entries, long exits and long bars (plus the long mask) from one diff over the positions"""
+    is_long = np.asarray(position) == 1
+    change = np.diff(is_long.astype(np.int8), prepend=0)
+    
+    entries = np.flatnonzero(change == 1)
+    exits = np.flatnonzero((change == -1) & (np.asarray(position) == 0))
+    return entries, exits, np.flatnonzero(is_long), is_long
+
+
+def _grid_matrix(results_df, x_col, y_col, value_col):
+    """Sorted y values, the value matrix (NaN for missing cells) and sorted x values of a parameter grid"""
+    rows, row_idx = np.unique(results_df[y_col].to_numpy(), return_inverse=True)
+    cols, col_idx = np.unique(results_df[x_col].to_numpy(), return_inverse=True)
+    
+    matrix = np.full((len(rows), len(cols)), np.nan)
+    matrix[row_idx, col_idx] = results_df[value_col].to_numpy(dtype=np.float64)
+    return rows, matrix, cols
+
+
+def _draw_heatmap(ax, rows, matrix, cols, annotate_limit=400):
+    """Heatmap of a grid matrix with imshow (diverging colors centered on 0, NaN cells blank, a colorbar).
+    
+    Cell values are written on grids up to annotate_limit cells; above that one text artist per cell
+    dominates the drawing time and the labels no longer fit anyway.
+    """
+    plt = _pyplot()
+    finite = np.abs(matrix[np.isfinite(matrix)])
+    vrange = float(finite.max()) if finite.size and finite.max() > 0 else 1.0
+    norm = plt.Normalize(-vrange, vrange)
+    cmap = plt.get_cmap('RdYlGn')
+    
+    image = ax.imshow(matrix, cmap=cmap, norm=norm, aspect='auto', interpolation='nearest')
+    ax.figure.colorbar(image, ax=ax)
+    ax.set_xticks(np.arange(len(cols)), [str(v) for v in cols])
+    ax.set_yticks(np.arange(len(rows)), [str(v) for v in rows])
+    
+    if matrix.size <= annotate_limit:
+        # Dark text on light cells and vice versa (relative luminance of every cell color at once)
+        rgb = cmap(norm(matrix))[..., :3]
+        rgb = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+        luminance = rgb @ np.array([0.2126, 0.7152, 0.0722])
+        for (i, j), value in np.ndenumerate(matrix):
+            if np.isfinite(value):
+                ax.text(j, i, f'{value:.2f}', ha='center', va='center',
+                        color='black' if luminance[i, j] > 0.408 else 'white')
+    return image
+
+
 class Plotter:
     def __init__(self):
-        plt.style.use('default')
+        # matplotlib is imported by the plot methods, so backtest-only runs never load it
+        pass
     
     def plot_equity_curve(self, df):
         """Plot equity curve and key indicators"""
+        plt = _pyplot()
+        
+        # 'fast' style plus aggressive path simplification and chunked Agg paths for long series
+        with plt.style.context('fast'), plt.rc_context({'path.simplify': True,
+                                                         'path.simplify_threshold': 1.0,
+                                                         'agg.path.chunksize': 10000}):
+            self._draw_equity_curve(plt, df)
+    
+    def _draw_equity_curve(self, plt, df):
+        """Draw the four equity curve panels (called inside plot_equity_curve's render settings)"""
         fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
         
+        # The decorative z-score panel shading and grid are skipped on long histories
+        dense = len(df) >= 5000
+        
+        # Long histories draw their lines from an LTTB sample picked on the equity curve
+        # (signal markers below stay at full resolution)
+        if len(df) > 3000:
+            line = df.iloc[_lttb_indices(df['equity_curve'].to_numpy(dtype=np.float64), 2000)]
+        else:
+            line = df
+        
         # 1. Price with Moving Average and signals
-        ax1.plot(df['timestamp'], df['close'], label='Price', color='black', linewidth=1.5)
+        ax1.plot(line['timestamp'], line['close'], label='Price', color='black', linewidth=1.5)
         
         # Add moving average if available
         if 'ma' in df.columns:
-            ax1.plot(df['timestamp'], df['ma'], label='Moving Average', color='blue', linewidth=2, alpha=0.8)
+            ax1.plot(line['timestamp'], line['ma'], label='Moving Average', color='blue', linewidth=2, alpha=0.8)
             
             # Add price bands (MA ± 1 and 2 standard deviations) if zscore data available
             if 'zscore' in df.columns:
                 # Calculate approximate price bands from z-score
                 price_std = (df['close'] - df['ma']).std()
-                upper_1std = df['ma'] + price_std
-                lower_1std = df['ma'] - price_std
-                upper_2std = df['ma'] + 2 * price_std
-                lower_2std = df['ma'] - 2 * price_std
+                upper_1std = line['ma'] + price_std
+                lower_1std = line['ma'] - price_std
+                upper_2std = line['ma'] + 2 * price_std
+                lower_2std = line['ma'] - 2 * price_std
                 
-                ax1.plot(df['timestamp'], upper_2std, color='red', alpha=0.5, linestyle='--', label='MA + 2σ')
-                ax1.plot(df['timestamp'], upper_1std, color='orange', alpha=0.5, linestyle='--', label='MA + 1σ')
-                ax1.plot(df['timestamp'], lower_1std, color='orange', alpha=0.5, linestyle='--', label='MA - 1σ')
-                ax1.plot(df['timestamp'], lower_2std, color='green', alpha=0.5, linestyle='--', label='MA - 2σ')
+                ax1.plot(line['timestamp'], upper_2std, color='red', alpha=0.5, linestyle='--', label='MA + 2σ')
+                ax1.plot(line['timestamp'], upper_1std, color='orange', alpha=0.5, linestyle='--', label='MA + 1σ')
+                ax1.plot(line['timestamp'], lower_1std, color='orange', alpha=0.5, linestyle='--', label='MA - 1σ')
+                ax1.plot(line['timestamp'], lower_2std, color='green', alpha=0.5, linestyle='--', label='MA - 2σ')
                 
                 # Fill areas
-                ax1.fill_between(df['timestamp'], upper_1std, upper_2std, alpha=0.1, color='red')
-                ax1.fill_between(df['timestamp'], lower_1std, lower_2std, alpha=0.1, color='green')
+                ax1.fill_between(line['timestamp'], upper_1std, upper_2std, alpha=0.1, color='red')
+                ax1.fill_between(line['timestamp'], lower_1std, lower_2std, alpha=0.1, color='green')
         
         # Mark long entry/exit signals
-        long_entries = df[(df['position'] == 1) & (df['position'].shift(1) != 1)]
-        long_exits = df[(df['position'] == 0) & (df['position'].shift(1) == 1)]
+        entry_idx, exit_idx, long_idx, is_long = _signal_rows(df['position'].to_numpy())
+        long_entries = df.iloc[entry_idx]
+        long_exits = df.iloc[exit_idx]
         
-        ax1.scatter(long_entries['timestamp'], long_entries['close'], 
-                   color='green', marker='^', s=60, label='Long Entry', zorder=5)
-        ax1.scatter(long_exits['timestamp'], long_exits['close'], 
-                   color='red', marker='v', s=60, label='Long Exit', zorder=5)
+        _add_markers(ax1, long_entries['timestamp'], long_entries['close'], '^', 60, 'green', 'Long Entry')
+        _add_markers(ax1, long_exits['timestamp'], long_exits['close'], 'v', 60, 'red', 'Long Exit')
         
         # Highlight periods when long
-        long_periods = df[df['position'] == 1]
-        if len(long_periods) > 0:
+        if len(long_idx) > 0:
             ax1.fill_between(df['timestamp'], df['close'].min(), df['close'].max(),
-                           where=(df['position'] == 1), alpha=0.05, color='green',
+                           where=is_long, alpha=0.05, color='green',
                            label='Long Position Periods')
         
         ax1.set_title('Price with Moving Average & Z-Score Strategy Signals')
@@ -60,7 +184,7 @@ class Plotter:
         
         # 2. Z-Score
         if 'zscore' in df.columns:
-            ax2.plot(df['timestamp'], df['zscore'], color='purple', linewidth=1, label='Z-Score')
+            ax2.plot(line['timestamp'], line['zscore'], color='purple', linewidth=1, label='Z-Score')
             
             # Add threshold lines
             zscore_max = df['zscore'].max()
@@ -78,41 +202,42 @@ class Plotter:
             ax2.axhline(y=0, color='black', linestyle='-', alpha=0.5, label='Mean (MA)')
             
             # Highlight long entry zones with background shading
-            ax2.fill_between(df['timestamp'], 0, df['zscore'].max(), 
-                           where=(df['zscore'] > 1.5), alpha=0.1, color='orange', 
-                           label='Long Entry Zone')
+            if not dense:
+                ax2.fill_between(line['timestamp'], 0, df['zscore'].max(), 
+                               where=(line['zscore'] > 1.5), alpha=0.1, color='orange', 
+                               label='Long Entry Zone')
             
             # Mark actual entry points
-            entry_points = df[df['position'] == 1]
+            entry_points = df.iloc[long_idx]
             if len(entry_points) > 0:
-                ax2.scatter(entry_points['timestamp'], entry_points['zscore'], 
-                          color='orange', marker='o', s=30, alpha=0.8, 
-                          label='Long Positions', zorder=5)
+                _add_markers(ax2, entry_points['timestamp'], entry_points['zscore'], 'o', 30, 'orange',
+                             'Long Positions', alpha=0.8)
             
             ax2.set_title('Z-Score (Price Deviation from MA)')
             ax2.set_ylabel('Z-Score')
             ax2.legend()
-            ax2.grid(True, alpha=0.3)
+            if not dense:
+                ax2.grid(True, alpha=0.3)
         elif 'ma' in df.columns:
             # Fallback: show price vs MA
-            ax2.plot(df['timestamp'], df['close'], color='black', linewidth=1, label='Price')
-            ax2.plot(df['timestamp'], df['ma'], color='blue', linewidth=1.5, label='Moving Average')
+            ax2.plot(line['timestamp'], line['close'], color='black', linewidth=1, label='Price')
+            ax2.plot(line['timestamp'], line['ma'], color='blue', linewidth=1.5, label='Moving Average')
             ax2.set_title('Price vs Moving Average')
             ax2.set_ylabel('Price ($)')
             ax2.legend()
             ax2.grid(True, alpha=0.3)
         
         # 3. Equity Curve
-        ax3.plot(df['timestamp'], df['equity_curve'], color='blue', linewidth=2, label='Strategy')
-        ax3.plot(df['timestamp'], (df['close'] / df['close'].iloc[0]), color='gray', alpha=0.7, label='Buy & Hold')
+        ax3.plot(line['timestamp'], line['equity_curve'], color='blue', linewidth=2, label='Strategy')
+        ax3.plot(line['timestamp'], (line['close'] / df['close'].iloc[0]), color='gray', alpha=0.7, label='Buy & Hold')
         ax3.set_title('Equity Curve Comparison')
         ax3.set_ylabel('Cumulative Return')
         ax3.legend()
         ax3.grid(True, alpha=0.3)
         
         # 4. Drawdown
-        ax4.fill_between(df['timestamp'], df['drawdown'] * 100, 0, color='red', alpha=0.3)
-        ax4.plot(df['timestamp'], df['drawdown'] * 100, color='red', linewidth=1)
+        ax4.fill_between(line['timestamp'], line['drawdown'] * 100, 0, color='red', alpha=0.3)
+        ax4.plot(line['timestamp'], line['drawdown'] * 100, color='red', linewidth=1)
         ax4.set_title('Drawdown')
         ax4.set_ylabel('Drawdown (%)')
         ax4.set_xlabel('Date')
@@ -123,11 +248,13 @@ class Plotter:
     
     def plot_optimization_heatmap(self, results_df, x_col, y_col, value_col):
         """Plot optimization results as heatmap"""
-        # Create pivot table for heatmap
-        pivot_data = results_df.pivot(index=y_col, columns=x_col, values=value_col)
+        plt = _pyplot()
+        
+        # Scatter the results into a (y values x x values) matrix by integer grid position
+        rows, matrix, cols = _grid_matrix(results_df, x_col, y_col, value_col)
         
         plt.figure(figsize=(12, 8))
-        sns.heatmap(pivot_data, annot=True, fmt='.2f', cmap='RdYlGn', center=0)
+        _draw_heatmap(plt.gca(), rows, matrix, cols)
         plt.title(f'Z-Score Strategy Optimization: {value_col.title()} by Parameters')
         plt.xlabel(f'{x_col.title()} (Z-Score Threshold)' if x_col == 'threshold' else x_col.title())
         plt.ylabel(f'{y_col.title()} (MA Window)' if y_col == 'window' else y_col.title())
@@ -158,10 +285,12 @@ class Plotter:
         ax2.set_title('MA Window vs Performance')
         ax2.grid(True, alpha=0.3)
         
-        # Add trend line
-        z = np.polyfit(results_df['window'], results_df['sharpe'], 1)
-        p = np.poly1d(z)
-        ax2.plot(results_df['window'], p(results_df['window']), "r--", alpha=0.8)
+        # Add trend line (a straight fit, so it is drawn between the smallest and largest window only;
+        # the rows are sorted by the metric and would otherwise retrace it once per result)
+        x = results_df['window'].to_numpy(dtype=np.float64)
+        z = np.polyfit(x, results_df['sharpe'].to_numpy(dtype=np.float64), 1)
+        ends = np.array([x.min(), x.max()])
+        ax2.plot(ends, np.polyval(z, ends), "r--", alpha=0.8)
         
         plt.tight_layout()
         plt.show()
\ No newline at end of file
@@ -1,5 +1,6 @@
-import ccxt
-import time
+import asyncio
+import ccxt.async_support as ccxt
+import os
 import pandas as pd
 import numpy as np
 import datetime
@@ -14,15 +15,13 @@ exchange = ccxt.bybit({
     'secret': '',
 })
 
-markets = exchange.load_markets()
 symbol = 'BTCUSDT'
-market = exchange.market(symbol)
 
 ### trade ###
-def trade(signal):
+async def trade(signal):
 
     ### get account info before trade ###
-    net_pos = current_pos()
+    net_pos = await current_pos()
 
     target_pos = max_pos * signal  # target_pos == 要買賣到幾多粒btc
     print('target_pos', target_pos)
@@ -32,53 +31,93 @@ def trade(signal):
     ### trade ###
     if target_pos > net_pos:
             print('long ed')
-            # exchange.create_order('BTCUSDT', 'market', 'buy', bet_size, None)
-            # time.sleep(1)
-            # order = exchange.fetch_my_trades('BTCUSDT')
+            # await exchange.create_order('BTCUSDT', 'market', 'buy', bet_size, None)
+            # await asyncio.sleep(1)
+            # order = await exchange.fetch_my_trades('BTCUSDT')
             # pprint(order[-1])
             # message = order[-1]
             # requests.get(base_url + message)
 
     elif target_pos < net_pos:
             print('short ed')
-            # exchange.create_order('BTCUSDT', 'market', 'sell', abs(bet_size), None)
-            # time.sleep(1)
-            # order = exchange.fetch_my_trades('BTCUSDT')
+            # await exchange.create_order('BTCUSDT', 'market', 'sell', abs(bet_size), None)
+            # await asyncio.sleep(1)
+            # order = await exchange.fetch_my_trades('BTCUSDT')
             # pprint(order[-1])
             # message = order[-1]
             # requests.get(base_url + message)
 
-    time.sleep(1)
+    await asyncio.sleep(1)
 
-    ### get account info after trade ###
-    net_pos = current_pos()
+    ### get account info after trade (position and balance requested together) ###
+    position, balance = await asyncio.gather(exchange.fetch_position(symbol), exchange.fetch_balance())
+    net_pos = net_position(position)
     print('after signal')
     print('current_pos', net_pos)
-    print('nav', datetime.datetime.now(), exchange.fetch_balance()['USDT']['total'])
+    print('nav', datetime.datetime.now(), balance['USDT']['total'])
     print('**********')
 
-def current_pos():
+def net_position(position):
     net_pos = 0
 
-    if exchange.fetchPosition(symbol)['info']['side'] == 'Buy':
-        net_pos = float(exchange.fetchPosition(symbol)['info']['size'])
+    if position['info']['side'] == 'Buy':
+        net_pos = float(position['info']['size'])
 
-    elif exchange.fetchPosition(symbol)['info']['side'] == 'Sell':
-        net_pos = -1 * float(exchange.fetchPosition(symbol)['info']['size'])
+    elif position['info']['side'] == 'Sell':
+        net_pos = -1 * float(position['info']['size'])
 
     return net_pos
 
+async def current_pos():
+    ### one request per check ###
+    return net_position(await exchange.fetch_position(symbol))
+
+def read_last_signal(path, column='pos'):
+    """Read one column of the CSV's last row by scanning back from the end of the file (no full parse)"""
+    with open(path, 'rb') as f:
+        header = f.readline().rstrip(b'\r\n').split(b',')
+        # Pull blocks off the end until the last complete line is in hand
+        offset = f.seek(0, os.SEEK_END)
+        tail = b''
+        while offset > 0 and b'\n' not in tail.rstrip(b'\r\n'):
+            step = min(4096, offset)
+            offset -= step
+            f.seek(offset)
+            tail = f.read(step) + tail
+    last = tail.rstrip(b'\r\n').rsplit(b'\n', 1)[-1].rstrip(b'\r')
+    return float(last.split(b',')[header.index(column.encode())])
+
 ### define variables ###
 pos = 0
 max_pos = 0.002  # max amount of btc
 
-while True:
-    if datetime.datetime.now().second == 10:
+signal_path = r'C:\Users\jarvi\Desktop\production_2\signal.csv'
+
+async def main():
+    markets = await exchange.load_markets()
+    market = exchange.market(symbol)
+    last_mtime = None
+    signal = None
+
+    try:
+        while True:
+            # Sleep straight to the next second 10 instead of waking every second
+            # (trade() takes at least a second, so the same minute can't fire twice)
+            now = datetime.datetime.now()
+            delay = (70 - now.second - now.microsecond / 1e6) % 60
+            await asyncio.sleep(delay)
+
+            # Re-read the signal only when the file has been rewritten since the last check
+            mtime = os.stat(signal_path).st_mtime_ns
+            if mtime != last_mtime:
+                last_mtime = mtime
+                signal = read_last_signal(signal_path) ### read the last row
 
-        df = pd.read_csv(r'C:\Users\jarvi\Desktop\production_2\signal.csv')
-        signal = df['pos'].iloc[-1] ### read the last row
-        print('signal_from_csv', signal)
+            print('signal_from_csv', signal)
 
-        trade(signal)
+            # Rebalance to the target every minute, so failed orders and manual changes get corrected
+            await trade(signal)
+    finally:
+        await exchange.close()
 
-    time.sleep(1)
+asyncio.run(main())
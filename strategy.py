@@ -3,41 +3,95 @@ import numpy as np
 from backtest import Backtester
 from plotting import Plotter
 from optimizer import Optimizer
+from numba_compat import NUMBA_AVAILABLE
+from indicators_nb import _rolling_mean_std_kernel, _zero_flat_std
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+
+def _copy_on_write():
+    """True when pandas copies on write (always from pandas 3, opt-in through mode.copy_on_write before)"""
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        return pd.get_option('mode.copy_on_write') is True
+    except (KeyError, AttributeError):
+        return False
+
+
+def _private_copy(data):
+    """Copy of the caller's frame that edits on either side never leak through (lazy under copy-on-write)"""
+    return data.copy(deep=not _copy_on_write())
+
+
+def _rolling_mean_std(prices, window):
+    """Rolling mean and sample std (ddof=1) as Series on the prices' index (Numba, bottleneck or pandas).
+    
+    All three paths report std 0 for a flat window, so the z-score there is NaN whichever one runs.
+    """
+    if NUMBA_AVAILABLE and window > 1:
+        ma, std = _rolling_mean_std_kernel(prices.to_numpy(dtype=np.float64), int(window))
+    else:
+        if bn is not None:
+            values = prices.to_numpy(dtype=np.float64)
+            ma = bn.move_mean(values, window, min_count=window)
+            std = bn.move_std(values, window, min_count=window, ddof=1)
+        else:
+            ma = prices.rolling(window).mean().to_numpy(dtype=np.float64)
+            std = prices.rolling(window).std().to_numpy(dtype=np.float64)
+        # bottleneck and pandas leave rounding noise in place of 0 for some constant windows
+        std = _zero_flat_std(ma, std, window)
+    
+    return pd.Series(ma, index=prices.index), pd.Series(std, index=prices.index)
 
 
 class Strategy:
     def __init__(self, data):
-        self.data = data.copy()
+        self.data = _private_copy(data)
         self.backtester = Backtester()
         self.plotter = Plotter()
         self.optimizer = Optimizer(self, self.backtester)
     
     def calculate_zscore(self, prices, window):
-        """Calculate z-score: (price - moving_average) / standard_deviation"""
-        ma = prices.rolling(window).mean()
-        std = prices.rolling(window).std()
-        zscore = (prices - ma) / std
+        """Calculate z-score: (price - moving_average) / standard_deviation (NaN for a flat window)"""
+        ma, std = _rolling_mean_std(prices, window)
+        zscore = (prices - ma) / std.where(std > 0)
         return zscore, ma
     
     def calculate_bollinger_bands(self, prices, window, multiplier):
         """Calculate Bollinger Bands"""
-        ma = prices.rolling(window).mean()
-        std = prices.rolling(window).std()
+        ma, std = _rolling_mean_std(prices, window)
         upper = ma + (multiplier * std)
         lower = ma - (multiplier * std)
         return ma, upper, lower
     
-    def generate_signals(self, window, threshold):
-        """Generate simple long-only z-score signals"""
-        df = self.data.copy()
-        
-        # Calculate z-score
-        df['zscore'], df['ma'] = self.calculate_zscore(df['close'], window)
+    def compute_indicators(self, window):
+        """Z-score and moving average for one window (threshold-independent, reusable across a sweep)"""
+        # Calculate z-score (assign adds the columns without deep-copying the price data)
+        zscore, ma = self.calculate_zscore(self.data['close'], window)
         
+        return self.data.assign(zscore=zscore, ma=ma)
+    
+    def signals_from_indicators(self, df, threshold):
+        """Long-only positions from precomputed indicators"""
         # Simple vectorized position logic: 1 if zscore > threshold, else 0
-        df['position'] = np.where(df['zscore'] > threshold, 1, 0)
+        return df.assign(position=np.where(df['zscore'] > threshold, 1, 0))
+    
+    def generate_signals(self, window, threshold):
+        """Generate simple long-only z-score signals"""
+        return self.signals_from_indicators(self.compute_indicators(window), threshold)
+    
+    def generate_position_matrix(self, window, thresholds):
+        """Long-only positions for one window and several thresholds (bars x thresholds), one z-score pass"""
+        zscore, _ = self.calculate_zscore(self.data['close'], window)
+        z = zscore.to_numpy(dtype=np.float64)
+        thresholds = np.asarray(thresholds, dtype=np.float64)
         
-        return df
+        # Broadcast the z-score column against every threshold (NaN z-scores stay flat like np.where)
+        return (z[:, None] > thresholds[None, :]).astype(np.int64)
     
     def backtest(self, window=20, threshold=2.0):
         """Run backtest with given parameters"""
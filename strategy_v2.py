@@ -3,6 +3,12 @@ import numpy as np
 from backtest import Backtester
 from plotting import Plotter
 from optimizer import Optimizer
+from strategy import _rolling_mean_std, _private_copy
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
 
 
 class StrategyV2:
@@ -19,49 +25,65 @@ class StrategyV2:
     """
     
     def __init__(self, data, transaction_cost=0.001, position_size=0.25):
-        self.data = data.copy()
+        self.data = _private_copy(data)
         self.transaction_cost = transaction_cost  # 0.1% per trade
         self.position_size = position_size        # Risk 25% of capital per trade
         self.backtester = Backtester()
         self.plotter = Plotter()
         self.optimizer = Optimizer(self, self.backtester)
+        self._trend_cache = {}  # trend_window -> (trend_up, long_term_ma) on self.data
     
     def calculate_zscore(self, prices, window):
-        """Calculate z-score: (price - moving_average) / standard_deviation"""
-        ma = prices.rolling(window).mean()
-        std = prices.rolling(window).std()
-        zscore = (prices - ma) / std
+        """Calculate z-score: (price - moving_average) / standard_deviation (NaN for a flat window)"""
+        ma, std = _rolling_mean_std(prices, window)
+        zscore = (prices - ma) / std.where(std > 0)
         return zscore, ma
     
     def calculate_trend_filter(self, prices, trend_window=200):
         """Calculate long-term trend filter"""
-        long_term_ma = prices.rolling(trend_window).mean()
+        if bn is not None:
+            # C moving mean straight on the array, NaN until the window is full like rolling().mean()
+            values = prices.to_numpy(dtype=np.float64)
+            long_term_ma = pd.Series(bn.move_mean(values, trend_window, min_count=trend_window), index=prices.index)
+        else:
+            long_term_ma = prices.rolling(trend_window).mean()
         trend_up = prices > long_term_ma
         return trend_up, long_term_ma
     
-    def generate_signals(self, window, threshold, use_trend_filter=True):
-        """Generate improved mean reversion signals"""
-        df = self.data.copy()
-        
+    def _cached_trend_filter(self, trend_window=200):
+        """Trend filter on self.data, computed once per trend_window (it does not depend on the z-score window)"""
+        if trend_window not in self._trend_cache:
+            self._trend_cache[trend_window] = self.calculate_trend_filter(self.data['close'], trend_window)
+        return self._trend_cache[trend_window]
+    
+    def compute_indicators(self, window, use_trend_filter=True):
+        """Z-score, moving average and trend filter for one window (threshold-independent)"""
         # Calculate z-score and moving average
-        df['zscore'], df['ma'] = self.calculate_zscore(df['close'], window)
+        zscore, ma = self.calculate_zscore(self.data['close'], window)
         
         # Calculate trend filter (optional)
         if use_trend_filter:
-            df['trend_up'], df['long_term_ma'] = self.calculate_trend_filter(df['close'])
+            trend_up, long_term_ma = self._cached_trend_filter()
         else:
-            df['trend_up'] = True  # Always allow trades
-            df['long_term_ma'] = df['ma']  # Use short-term MA as placeholder
+            trend_up = True  # Always allow trades
+            long_term_ma = ma  # Use short-term MA as placeholder
         
+        # assign adds the columns without deep-copying the price data
+        return self.data.assign(zscore=zscore, ma=ma, trend_up=trend_up, long_term_ma=long_term_ma)
+    
+    def signals_from_indicators(self, df, threshold):
+        """Mean reversion positions from precomputed indicators"""
         # FIXED LOGIC: True mean reversion
         # Buy when price is BELOW moving average (oversold condition)
         # Only trade in the direction of the long-term trend
         long_signal = (df['zscore'] < -threshold) & df['trend_up']  # Buy dips in uptrend
         
         # Apply position sizing
-        df['position'] = np.where(long_signal, self.position_size, 0.0)
-        
-        return df
+        return df.assign(position=np.where(long_signal, self.position_size, 0.0))
+    
+    def generate_signals(self, window, threshold, use_trend_filter=True):
+        """Generate improved mean reversion signals"""
+        return self.signals_from_indicators(self.compute_indicators(window, use_trend_filter), threshold)
     
     def calculate_transaction_costs(self, df):
         """Calculate realistic transaction costs"""
@@ -82,7 +104,7 @@ class StrategyV2:
         df_signals = self.generate_signals(window, threshold, use_trend_filter)
         
         # Add transaction costs to the backtest
-        df_signals['transaction_costs'] = self.calculate_transaction_costs(df_signals)
+        df_signals = df_signals.assign(transaction_costs=self.calculate_transaction_costs(df_signals))
         
         # Run backtest with custom transaction cost handling
         results = self._run_backtest_with_costs(df_signals)
@@ -94,23 +116,28 @@ class StrategyV2:
     
     def _run_backtest_with_costs(self, df):
         """Run backtest with transaction costs included"""
-        df_test = df.copy()
-        
         # Calculate returns
-        df_test['returns'] = df_test['close'].pct_change().fillna(0)
+        returns = df['close'].pct_change().fillna(0)
         
         # Calculate PnL with transaction costs
-        gross_pnl = df_test['position'].shift(1) * df_test['returns']
-        net_pnl = gross_pnl - df_test['transaction_costs']
-        df_test['pnl'] = net_pnl
+        gross_pnl = df['position'].shift(1) * returns
+        net_pnl = gross_pnl - df['transaction_costs']
         
         # Calculate cumulative performance
-        df_test['cumulative_pnl'] = df_test['pnl'].cumsum()
-        df_test['equity_curve'] = (1 + df_test['pnl']).cumprod()
+        equity_curve = (1 + net_pnl).cumprod()
         
         # Calculate drawdown
-        df_test['running_max'] = df_test['equity_curve'].cummax()
-        df_test['drawdown'] = (df_test['equity_curve'] - df_test['running_max']) / df_test['running_max']
+        running_max = equity_curve.cummax()
+        
+        # Attach the derived columns in one step instead of copying the frame and inserting them one by one
+        df_test = df.assign(
+            returns=returns,
+            pnl=net_pnl,
+            cumulative_pnl=net_pnl.cumsum(),
+            equity_curve=equity_curve,
+            running_max=running_max,
+            drawdown=(equity_curve - running_max) / running_max
+        )
         
         # Calculate metrics using Analyzer
         metrics = self.backtester.calculate_metrics(df_test)
@@ -167,6 +194,10 @@ class StrategyV2:
             'threshold': threshold
         }
         
+        # Recompute the trend filter from the current data once, before the strategy is shipped to the workers
+        self._trend_cache.clear()
+        self._cached_trend_filter()
+        
         # Run optimization
         results_df = self.optimizer.optimize_parameters(param_ranges, metric)
         
@@ -179,19 +210,19 @@ class StrategyV2:
         """Compare V2 strategy with V1 logic"""
         print(f"\n=== V1 vs V2 Strategy Comparison ===")
         
-        # V1 Logic (momentum/breakout)
-        df_v1 = self.data.copy()
-        df_v1['zscore'], df_v1['ma'] = self.calculate_zscore(df_v1['close'], window)
-        df_v1['position'] = np.where(df_v1['zscore'] > threshold, 1, 0)  # Buy breakouts
-        
         # V2 Logic (mean reversion)
         df_v2 = self.generate_signals(window, threshold, use_trend_filter=True)
         
+        # V1 Logic (momentum/breakout) on the same z-score, no second rolling pass or frame copy
+        zscore = df_v2['zscore'].to_numpy()
+        v1_long = zscore > threshold  # Buy breakouts
+        df_v1 = self.data.assign(zscore=df_v2['zscore'], ma=df_v2['ma'], position=v1_long.astype(np.int64))
+        
         print(f"V1 (Momentum): Buy when z-score > {threshold} (price ABOVE MA)")
         print(f"V2 (Mean Rev): Buy when z-score < -{threshold} (price BELOW MA)")
         
-        v1_trades = (df_v1['position'] == 1).sum()
-        v2_trades = (df_v2['position'] > 0).sum()
+        # Days in market for both strategies counted in one pass over the stacked masks
+        v1_trades, v2_trades = np.count_nonzero(np.stack([v1_long, df_v2['position'].to_numpy() > 0]), axis=1)
         
         print(f"V1 Trading Days: {v1_trades} ({v1_trades/len(df_v1)*100:.1f}% time in market)")
         print(f"V2 Trading Days: {v2_trades} ({v2_trades/len(df_v2)*100:.1f}% time in market)")
@@ -1,9 +1,87 @@
 import pandas as pd
 import numpy as np
 import ta
+from itertools import chain
 from backtest import Backtester
-from plotting import Plotter
-from optimizer import Optimizer
+from plotting import Plotter, _add_markers, _signal_rows, _grid_matrix, _draw_heatmap
+from optimizer import Optimizer, _param_values, _collect_results
+from analyzer import METRIC_DECIMALS
+from numba_compat import njit, NUMBA_AVAILABLE
+from indicators_nb import _rsi_kernel
+from strategy import _private_copy
+
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
+
+@njit(cache=True)
+def _rsi_positions(rsi, levels):
+    """Long while RSI stays above each level after crossing up, flat after crossing back down (bars x levels)"""
+    n = rsi.shape[0]
+    position = np.zeros((n, levels.shape[0]), dtype=np.int8)
+    
+    # One pass over the bars updates every level's state from the same pair of RSI values
+    for i in range(1, n):
+        prev = rsi[i - 1]
+        cur = rsi[i]
+        for k in range(levels.shape[0]):
+            if prev <= levels[k] < cur:
+                position[i, k] = 1
+            elif prev >= levels[k] > cur:
+                position[i, k] = 0
+            else:
+                position[i, k] = position[i - 1, k]
+    return position
+
+
+def _rsi_positions_numpy(rsi, levels):
+    """NumPy version of _rsi_positions: broadcast the crossings of every level, then forward-fill the last event"""
+    prev, cur = rsi[:-1, None], rsi[1:, None]
+    levels = levels[None, :]
+    events = np.full((len(rsi), levels.shape[1]), -1, dtype=np.int8)
+    events[0] = 0
+    events[1:][(prev <= levels) & (cur > levels)] = 1
+    events[1:][(prev >= levels) & (cur < levels)] = 0
+    
+    last_event = np.maximum.accumulate(np.where(events >= 0, np.arange(len(rsi))[:, None], 0), axis=0)
+    return np.take_along_axis(events, last_event, axis=0)
+
+
+def _rsi_position_matrix(rsi, levels):
+    """Crossover positions of one RSI array for several levels (Numba kernel or its NumPy version)"""
+    levels = np.asarray(levels, dtype=np.float64)
+    if NUMBA_AVAILABLE:
+        return _rsi_positions(rsi, levels)
+    return _rsi_positions_numpy(rsi, levels)
+
+
+def _run_rsi_length(strategy, param_list):
+    """Backtest the combinations sharing one rsi_length as one batch on the shared price arrays (None rows on error)"""
+    rsi_length = int(param_list[0]['rsi_length'])
+    thresholds = [params['rsi_overbought'] for params in param_list]
+    
+    try:
+        # One RSI pass, one position column per threshold, no per-combination DataFrame
+        positions = strategy.generate_position_matrix(rsi_length, thresholds)
+        
+        # Thresholds the RSI never crosses stay flat, which always scores as the empty metrics
+        # (zero PnL has zero std), so only the columns that trade are backtested
+        active = positions.any(axis=0)
+        metrics_list = [strategy.backtester.analyzer._get_empty_metrics() for _ in thresholds]
+        if active.any():
+            _, _, active_metrics = strategy.backtester.run_backtest_batch(strategy.data, positions[:, active])
+            for i, metrics in zip(np.flatnonzero(active), active_metrics):
+                metrics_list[i] = metrics
+    except Exception as e:
+        print(f"Error with rsi_length {rsi_length}: {e}")
+        return [None] * len(param_list)
+    
+    return [
+        {'rsi_length': rsi_length, 'rsi_overbought': threshold, **metrics}
+        for threshold, metrics in zip(thresholds, metrics_list)
+    ]
 
 
 class Strategy3:
@@ -16,13 +94,15 @@ class Strategy3:
     """
     
     def __init__(self, data):
-        self.data = data.copy()
+        self.data = _private_copy(data)
         self.backtester = Backtester()
         self.plotter = Plotter()
         self.optimizer = Optimizer(self, self.backtester)
     
     def calculate_rsi(self, prices, window):
-        """Calculate RSI using ta library"""
+        """Calculate RSI (compiled kernel with Numba, otherwise the ta library)"""
+        if NUMBA_AVAILABLE:
+            return pd.Series(_rsi_kernel(prices.to_numpy(dtype=np.float64), int(window)), index=prices.index, name='rsi')
         return ta.momentum.rsi(prices, window=window)
     
     def generate_signals(self, rsi_length=14, rsi_overbought=70):
@@ -35,35 +115,25 @@ class Strategy3:
         Returns:
             DataFrame with RSI values and position signals
         """
-        df = self.data.copy()
-        
-        # Calculate RSI
-        df['rsi'] = self.calculate_rsi(df['close'], rsi_length)
-        
-        # Initialize position column
-        df['position'] = 0
-        
-        # Generate signals using vectorized approach
+        return self.signals_from_indicators(self.compute_indicators(rsi_length), rsi_overbought)
+    
+    def compute_indicators(self, rsi_length=14):
+        """RSI for one length (threshold-independent, reusable across a sweep)"""
+        # Calculate RSI (assign adds the column without deep-copying the price data)
+        return self.data.assign(rsi=self.calculate_rsi(self.data['close'], rsi_length))
+    
+    def signals_from_indicators(self, df, rsi_overbought=70):
+        """RSI momentum positions from precomputed indicators"""
         # Long entry: RSI crosses above threshold
         # Long exit: RSI crosses below threshold
-        for i in range(1, len(df)):
-            current_rsi = df.iloc[i]['rsi']
-            previous_rsi = df.iloc[i-1]['rsi']
-            previous_position = df.iloc[i-1]['position']
-            
-            # Long entry condition: RSI crosses above overbought level
-            if previous_rsi <= rsi_overbought < current_rsi:
-                df.iloc[i, df.columns.get_loc('position')] = 1
-            
-            # Long exit condition: RSI crosses below overbought level  
-            elif previous_rsi >= rsi_overbought > current_rsi:
-                df.iloc[i, df.columns.get_loc('position')] = 0
-            
-            # Hold previous position if no signal
-            else:
-                df.iloc[i, df.columns.get_loc('position')] = previous_position
-        
-        return df
+        # Hold previous position if no signal
+        rsi = df['rsi'].to_numpy(dtype=np.float64)
+        return df.assign(position=_rsi_position_matrix(rsi, [rsi_overbought])[:, 0])
+    
+    def generate_position_matrix(self, rsi_length, thresholds):
+        """Positions for one RSI length and several thresholds (bars x thresholds), one RSI pass"""
+        rsi = self.calculate_rsi(self.data['close'], rsi_length).to_numpy(dtype=np.float64)
+        return _rsi_position_matrix(rsi, thresholds)
     
     def backtest(self, rsi_length=14, rsi_overbought=70):
         """Run backtest with given parameters"""
@@ -109,8 +179,8 @@ class Strategy3:
         
         return results_df
     
-    def _optimize_rsi_parameters(self, param_ranges, metric='sharpe'):
-        """Optimize RSI parameters using modified grid search"""
+    def _optimize_rsi_parameters(self, param_ranges, metric='sharpe', n_jobs=-1):
+        """Optimize RSI parameters using modified grid search (n_jobs: worker processes, 1 = serial)"""
         from itertools import product
         
         # Generate parameter combinations
@@ -118,7 +188,7 @@ class Strategy3:
         for param, param_range in param_ranges.items():
             if isinstance(param_range, tuple) and len(param_range) == 3:
                 start, stop, step = param_range
-                param_lists[param] = np.arange(start, stop + step, step)
+                param_lists[param] = _param_values(start, stop, step)
             else:
                 param_lists[param] = param_range
         
@@ -128,46 +198,31 @@ class Strategy3:
         
         print(f"Total combinations to test: {len(param_combinations)}")
         
-        results = []
-        
-        for i, params in enumerate(param_combinations):
-            if (i + 1) % 10 == 0 or i == 0:
-                print(f"Progress: {i + 1}/{len(param_combinations)}")
-            
-            try:
-                # Generate signals with current parameters
-                df_signals = self.generate_signals(
-                    rsi_length=int(params['rsi_length']),
-                    rsi_overbought=params['rsi_overbought']
-                )
-                
-                # Run backtest using Backtester
-                df_backtest = self.backtester.run_backtest(df_signals, silent=True)
-                
-                # Extract metrics
-                metrics = self.backtester.calculate_metrics(df_backtest)
-                
-                # Store results
-                result = {
-                    'rsi_length': int(params['rsi_length']),
-                    'rsi_overbought': params['rsi_overbought'],
-                    **metrics
-                }
-                results.append(result)
-                
-            except Exception as e:
-                print(f"Error with params {params}: {e}")
-                continue
-        
-        # Convert to DataFrame and sort
-        results_df = pd.DataFrame(results)
+        # RSI depends only on the length (the grid's outer loop), so each run of one length is a task
+        groups = []
+        for params in param_combinations:
+            if groups and groups[-1][0]['rsi_length'] == params['rsi_length']:
+                groups[-1].append(params)
+            else:
+                groups.append([params])
+        
+        # The groups are independent, so spread them over a process pool when joblib is installed
+        if Parallel is not None and n_jobs != 1:
+            parallel = Parallel(n_jobs=n_jobs, backend='loky', return_as='generator',
+                                max_nbytes='1M', mmap_mode='r')
+            runs = chain.from_iterable(parallel(delayed(_run_rsi_length)(self, param_list) for param_list in groups))
+        else:
+            runs = chain.from_iterable(_run_rsi_length(self, param_list) for param_list in groups)
+        
+        # Convert to DataFrame (rows filled by grid position into preallocated columns) and sort
+        results_df = _collect_results(runs, len(param_combinations))
         results_df = results_df.sort_values(metric, ascending=False)
         
         # Print top results
         print(f"\nTop 10 parameter combinations by {metric}:")
         display_cols = ['rsi_length', 'rsi_overbought', 'sharpe', 'sortino', 'annual_return', 'max_drawdown', 'calmar', 'profit_factor']
         available_cols = [col for col in display_cols if col in results_df.columns]
-        print(results_df[available_cols].head(10).to_string(index=False))
+        print(results_df[available_cols].head(10).round(METRIC_DECIMALS).to_string(index=False))
         
         return results_df
     
@@ -181,19 +236,17 @@ class Strategy3:
         ax1.plot(df['timestamp'], df['close'], label='Price', color='black', linewidth=1.5)
         
         # Mark long entry/exit signals
-        long_entries = df[(df['position'] == 1) & (df['position'].shift(1) != 1)]
-        long_exits = df[(df['position'] == 0) & (df['position'].shift(1) == 1)]
+        entry_idx, exit_idx, long_idx, is_long = _signal_rows(df['position'].to_numpy())
+        long_entries = df.iloc[entry_idx]
+        long_exits = df.iloc[exit_idx]
         
-        ax1.scatter(long_entries['timestamp'], long_entries['close'], 
-                   color='green', marker='^', s=60, label='Long Entry', zorder=5)
-        ax1.scatter(long_exits['timestamp'], long_exits['close'], 
-                   color='red', marker='v', s=60, label='Long Exit', zorder=5)
+        _add_markers(ax1, long_entries['timestamp'], long_entries['close'], '^', 60, 'green', 'Long Entry')
+        _add_markers(ax1, long_exits['timestamp'], long_exits['close'], 'v', 60, 'red', 'Long Exit')
         
         # Highlight periods when long
-        long_periods = df[df['position'] == 1]
-        if len(long_periods) > 0:
+        if len(long_idx) > 0:
             ax1.fill_between(df['timestamp'], df['close'].min(), df['close'].max(),
-                           where=(df['position'] == 1), alpha=0.05, color='green',
+                           where=is_long, alpha=0.05, color='green',
                            label='Long Position Periods')
         
         ax1.set_title('Price with RSI Momentum Strategy Signals')
@@ -212,11 +265,10 @@ class Strategy3:
         ax2.fill_between(df['timestamp'], 0, 30, alpha=0.1, color='green', label='Oversold Zone')
         
         # Mark actual entry points
-        entry_points = df[df['position'] == 1]
+        entry_points = df.iloc[long_idx]
         if len(entry_points) > 0:
-            ax2.scatter(entry_points['timestamp'], entry_points['rsi'], 
-                      color='orange', marker='o', s=30, alpha=0.8, 
-                      label='Long Positions', zorder=5)
+            _add_markers(ax2, entry_points['timestamp'], entry_points['rsi'], 'o', 30, 'orange',
+                         'Long Positions', alpha=0.8)
         
         ax2.set_title('RSI with Entry/Exit Levels')
         ax2.set_ylabel('RSI')
@@ -246,13 +298,12 @@ class Strategy3:
     def plot_rsi_optimization_heatmap(self, results_df, x_col, y_col, value_col):
         """Plot RSI optimization results as heatmap"""
         import matplotlib.pyplot as plt
-        import seaborn as sns
         
-        # Create pivot table for heatmap
-        pivot_data = results_df.pivot(index=y_col, columns=x_col, values=value_col)
+        # Scatter the results into a (y values x x values) matrix for the heatmap
+        rows, matrix, cols = _grid_matrix(results_df, x_col, y_col, value_col)
         
         plt.figure(figsize=(12, 8))
-        sns.heatmap(pivot_data, annot=True, fmt='.2f', cmap='RdYlGn', center=0)
+        _draw_heatmap(plt.gca(), rows, matrix, cols)
         plt.title(f'RSI Strategy Optimization: {value_col.title()} by Parameters')
         plt.xlabel(f'{x_col.title().replace("_", " ")}')
         plt.ylabel(f'{y_col.title().replace("_", " ")}')
@@ -283,10 +334,12 @@ class Strategy3:
         ax2.set_title(f'RSI Length vs Performance')
         ax2.grid(True, alpha=0.3)
         
-        # Add trend line
-        z = np.polyfit(results_df['rsi_length'], results_df[value_col], 1)
-        p = np.poly1d(z)
-        ax2.plot(results_df['rsi_length'], p(results_df['rsi_length']), "r--", alpha=0.8)
+        # Add trend line (a straight fit, so it is drawn between the smallest and largest length only;
+        # the rows are sorted by the metric and would otherwise retrace it once per result)
+        x = results_df['rsi_length'].to_numpy(dtype=np.float64)
+        z = np.polyfit(x, results_df[value_col].to_numpy(dtype=np.float64), 1)
+        ends = np.array([x.min(), x.max()])
+        ax2.plot(ends, np.polyval(z, ends), "r--", alpha=0.8)
         
         plt.tight_layout()
         plt.show()
\ No newline at end of file
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from hyperliquid_strategy import _zscore_arrays
+
+
+def _pandas_zscore(close, window):
+    prices = pd.Series(close)
+    ma = prices.rolling(window).mean()
+    return ((prices - ma) / prices.rolling(window).std()).to_numpy()
+
+
+def test_flat_tail_matches_pandas():
+    window = 20
+    for seed in range(200):
+        rng = np.random.default_rng(seed)
+        walk = 60000 + np.cumsum(rng.normal(0, 50, 300))
+        close = np.concatenate([walk, np.full(25, walk[-1])])
+        
+        zscore, _ = _zscore_arrays(close, window)
+        expected = _pandas_zscore(close, window)
+        
+        flat = 25 + 1 - window + 1     # walk[-1] plus 25 repeats
+        assert not np.isinf(zscore).any(), seed
+        # A fully flat window has no z-score (pandas gives NaN, or 0 off its own rounding residue)
+        assert np.isnan(zscore[-flat:]).all(), seed
+        np.testing.assert_allclose(zscore[:-flat], expected[:-flat], rtol=1e-6, atol=1e-6,
+                                   equal_nan=True, err_msg=str(seed))
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+import strategy
+from strategy import Strategy
+from strategy_v2 import StrategyV2
+
+
+def _flat_tail_series(seed, flat_bars=30):
+    rng = np.random.default_rng(seed)
+    walk = 60000 + np.cumsum(rng.normal(0, 50, 300))
+    return pd.Series(np.concatenate([walk, np.full(flat_bars, walk[-1])]))
+
+
+def _check_flat_tail(strategy_cls):
+    for seed in range(100):
+        close = _flat_tail_series(seed)
+        instance = strategy_cls(pd.DataFrame({'close': close}))
+        for window in (10, 20):
+            zscore, _ = instance.calculate_zscore(close, window)
+            expected = (close - close.rolling(window).mean()) / close.rolling(window).std()
+            
+            flat = 30 + 1 - window + 1     # walk[-1] plus 30 repeats
+            assert not np.isinf(zscore).any(), seed
+            # A fully flat window has no z-score (pandas gives NaN, or 0 off its own rounding residue)
+            assert zscore.iloc[-flat:].isna().all(), seed
+            np.testing.assert_allclose(zscore.iloc[:-flat], expected.iloc[:-flat], rtol=1e-6, atol=1e-6,
+                                       equal_nan=True, err_msg=str(seed))
+
+
+def test_zscore_flat_tail_matches_pandas():
+    _check_flat_tail(Strategy)
+    _check_flat_tail(StrategyV2)
+
+
+def test_zscore_flat_tail_fallbacks(monkeypatch):
+    monkeypatch.setattr(strategy, 'NUMBA_AVAILABLE', False)
+    _check_flat_tail(Strategy)
+    _check_flat_tail(StrategyV2)
+    monkeypatch.setattr(strategy, 'bn', None)
+    _check_flat_tail(Strategy)
+    _check_flat_tail(StrategyV2)